@@ -1,43 +1,541 @@
+import os
+import random
+import re
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from itertools import groupby, islice
 
-import sqlite3
+from connectionPool import ConnectionPool
+from metrics import Metrics
+from queryCache import QueryCache
+from roomInventory import RoomInventory
+
+DATABASE = 'hotel.db'
+
+def archive_database(database):
+    """Path of the archive kept next to database (hotel.db -> hotel.archive.db); see "Archive"."""
+    root, ext = os.path.splitext(database)
+    return f'{root}.archive{ext or ".db"}'
+
+def _open_pool(database, **options):
+    # Every connection has the database's archive attached as `archive`.
+    return ConnectionPool(database, attach={'archive': archive_database(database)}, **options)
+
+pool = _open_pool(DATABASE)
+
+# The property (see "Properties" below) that Models calls on this thread go to.
+_property_state = threading.local()
+
+def current_property():
+    """ID of the property selected with use_property() on this thread, or None."""
+    return getattr(_property_state, 'property_id', None)
+
+def current_pool():
+    """Connection pool of the selected property, or the default pool."""
+    property_pool = getattr(_property_state, 'pool', None)
+    return pool if property_pool is None else property_pool
+
+# Results of the get_* readers, kept per property; emptied after every committed
+# write, including writes by other processes, and at the start of a new day
+# (see data_marker()).
+cache = QueryCache(scope=current_property, marker=lambda: data_marker())
+
+# Per-statement timings, row counts and the slow-query log (see metrics.py).
+metrics = Metrics()
+
+def configure_pool(database=DATABASE, property_directory=None, **options):
+    """Replace the shared connection pool (database path, pool_size, pragmas...).
+
+    Property databases live in property_directory, by default a `properties`
+    directory next to the database, and get pools with the same options.
+    """
+    global pool, _pool_options, _property_directory
+    old_pool = pool
+    pool = _open_pool(database, **options)
+    old_pool.close()
+    with _property_lock:
+        for property_pool in _property_pools.values():
+            property_pool.close()
+        _property_pools.clear()
+        _pool_options = options
+        _property_directory = property_directory or os.path.join(os.path.dirname(database), PROPERTY_DIRECTORY)
+    _migrated.clear()
+    cache.invalidate()
+    _reset_room_inventory(everywhere=True)
+    return pool
 
 def create_connection():
+    """Check out this thread's pooled connection; pair with release_connection()."""
     try:
-        conn = sqlite3.connect('hotel.db')  # Creates or opens the hotel.db file
-        return conn
+        return current_pool().acquire()
     except sqlite3.Error as e:
         print(f"Database connection error: {e}")
         return None
 
+def release_connection():
+    current_pool().release()
+
+def _data_changed():
+    """Called once a write has been committed."""
+    global _change_generation
+    cache.invalidate()
+    with _change_signal:
+        _change_generation += 1
+        _change_signal.notify_all()
+
+class Transaction:
+    """Runs several statements on one connection and commits them together."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.dirty = False
+        # Errors raised out of nested transaction() blocks, which callers
+        # usually catch and report; see writeBehind.py.
+        self.errors = []
+
+    def execute(self, query, params=(), fetch=False, many=False):
+        if not fetch:
+            self.dirty = True
+        return _run_statement(self.conn, query, params, fetch, many)
+
+def _run_statement(conn, query, params, fetch, many):
+    """Execute one statement on conn and record it in metrics.
+
+    Returns the fetched rows, or for a write the number of rows it changed.
+    """
+    started = time.perf_counter()
+    cursor = conn.cursor()
+    if many:
+        cursor.executemany(query, params)
+    else:
+        cursor.execute(query, params)
+    result = cursor.fetchall() if fetch else max(cursor.rowcount, 0)
+    metrics.observe_query(query, len(result) if fetch else result, time.perf_counter() - started)
+    return result
+
+_tx_state = threading.local()
+
+@contextmanager
+def transaction(immediate=False):
+    """Unit of work: `with transaction() as tx:` commits once, or rolls back on error.
+
+    Nested transaction() blocks join the outermost one, and execute_query calls
+    made on the same thread inside the block run in the same transaction.
+    """
+    current = getattr(_tx_state, 'tx', None)
+    if current is not None:
+        try:
+            yield current
+        except sqlite3.Error as e:
+            current.errors.append(e)
+            raise
+        return
+    tx_pool = current_pool()
+    conn = tx_pool.acquire()
+    try:
+        conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+        tx = Transaction(conn)
+        _tx_state.tx = tx
+        try:
+            yield tx
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        _run_statement(conn, 'COMMIT', (), False, False)
+        if tx.dirty:
+            _data_changed()
+    finally:
+        _tx_state.tx = None
+        tx_pool.release()
+
+# Retrying busy transactions
+#
+# Connections wait up to the pool's timeout for a lock, but a writer can still
+# get SQLITE_BUSY (a timeout under heavy contention, or a WAL snapshot that went
+# stale before a deferred transaction tried to write). run_with_retry() reruns
+# the whole unit of work after an exponential, jittered backoff.
+
+BUSY_RETRIES = 5
+BUSY_BACKOFF = 0.02
+
+def _is_busy(error):
+    code = getattr(error, 'sqlite_errorcode', None)  # Python 3.11+
+    if code is not None:
+        return code & 0xff in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+    message = str(error)
+    return 'locked' in message or 'busy' in message
+
+def run_with_retry(work, retries=BUSY_RETRIES, backoff=BUSY_BACKOFF):
+    """Call work(), a function running one complete transaction, retrying it while SQLite is busy.
+
+    Inside an outer transaction there is nothing safe to retry, so errors propagate.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return work()
+        except sqlite3.OperationalError as e:
+            if attempt == retries or not _is_busy(e) or getattr(_tx_state, 'tx', None) is not None:
+                raise
+            time.sleep(backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+# Schema Migrations
+#
+# Each migration brings the schema up one version. PRAGMA user_version records
+# the last version applied, so create_tables() only runs what a database is
+# missing, whether it is brand new, built by the old create_tables() or the
+# checked-in hotel.db.
+
+def _create_base_tables(tx):
+    tx.execute('''
+    CREATE TABLE IF NOT EXISTS rooms (
+        roomNumber INTEGER PRIMARY KEY,
+        roomType TEXT,
+        price INTEGER,
+        availability BOOLEAN
+    )''')
+    tx.execute('''
+    CREATE TABLE IF NOT EXISTS customers (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        contact TEXT,
+        payment TEXT
+    )''')
+    tx.execute('''
+    CREATE TABLE IF NOT EXISTS reservations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id INTEGER,
+        roomNumber INTEGER,
+        checkIn TEXT,
+        checkOut TEXT,
+        FOREIGN KEY (customer_id) REFERENCES customers(id),
+        FOREIGN KEY (roomNumber) REFERENCES rooms(roomNumber)
+    )''')
+
+def _add_customer_payment(tx):
+    # Databases created by the first create_tables() have no payment column.
+    columns = [row[1] for row in tx.execute('PRAGMA table_info(customers)', fetch=True)]
+    if 'payment' not in columns:
+        tx.execute('ALTER TABLE customers ADD COLUMN payment TEXT')
+
+def _create_indexes(tx):
+    # (roomNumber, checkIn, checkOut) also serves plain roomNumber lookups.
+    tx.execute('CREATE INDEX IF NOT EXISTS idx_reservations_customer ON reservations(customer_id)')
+    tx.execute('CREATE INDEX IF NOT EXISTS idx_reservations_room_dates ON reservations(roomNumber, checkIn, checkOut)')
+    # Date-range index: stays still running after a given day, newest last.
+    tx.execute('CREATE INDEX IF NOT EXISTS idx_reservations_dates ON reservations(checkOut, checkIn, roomNumber)')
+    tx.execute('CREATE INDEX IF NOT EXISTS idx_customers_name ON customers(name)')
+
+def _create_occupancy_rollup(tx):
+    tx.execute('''
+    CREATE TABLE IF NOT EXISTS daily_occupancy (
+        day TEXT,
+        roomType TEXT,
+        occupied INTEGER NOT NULL DEFAULT 0,
+        arrivals INTEGER NOT NULL DEFAULT 0,
+        revenue INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, roomType)
+    ) WITHOUT ROWID''')
+    _rollup_stays(tx, 1)
+
+def _create_customer_search(tx):
+    # NOCASE index for case-insensitive name search, plain index for contacts.
+    tx.execute('CREATE INDEX IF NOT EXISTS idx_customers_name_nocase ON customers(name COLLATE NOCASE)')
+    tx.execute('CREATE INDEX IF NOT EXISTS idx_customers_contact ON customers(contact)')
+    # Full-text index over name and contact, kept in sync by triggers (the
+    # insert trigger is added by _add_customer_search_insert_trigger).
+    # Skipped when this SQLite build has no FTS5; search then sticks to the indexes.
+    try:
+        tx.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts
+        USING fts5(name, contact, content='customers', content_rowid='id')''')
+    except sqlite3.OperationalError:
+        return
+    tx.execute('''
+    CREATE TRIGGER IF NOT EXISTS customers_fts_delete AFTER DELETE ON customers BEGIN
+        INSERT INTO customers_fts (customers_fts, rowid, name, contact)
+        VALUES ('delete', old.id, old.name, old.contact);
+    END''')
+    tx.execute('''
+    CREATE TRIGGER IF NOT EXISTS customers_fts_update AFTER UPDATE ON customers BEGIN
+        INSERT INTO customers_fts (customers_fts, rowid, name, contact)
+        VALUES ('delete', old.id, old.name, old.contact);
+        INSERT INTO customers_fts (rowid, name, contact) VALUES (new.id, new.name, new.contact);
+    END''')
+    tx.execute("INSERT INTO customers_fts (customers_fts) VALUES ('rebuild')")
+
+def _add_customer_search_insert_trigger(tx):
+    # Customers inserted by anything but the Models insert functions went
+    # unindexed, and deleting them then corrupted the index: index every insert
+    # with a trigger, and rebuild the index from the table.
+    if not tx.execute("SELECT 1 FROM sqlite_master WHERE name = 'customers_fts'", fetch=True):
+        return
+    tx.execute('''
+    CREATE TRIGGER IF NOT EXISTS customers_fts_insert AFTER INSERT ON customers BEGIN
+        INSERT INTO customers_fts (rowid, name, contact) VALUES (new.id, new.name, new.contact);
+    END''')
+    tx.execute("INSERT INTO customers_fts (customers_fts) VALUES ('rebuild')")
+
+def _create_change_log(tx):
+    # AUTOINCREMENT: a sequence number is never handed out twice, even after pruning.
+    tx.execute('''
+    CREATE TABLE IF NOT EXISTS changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        entity TEXT NOT NULL,
+        key INTEGER
+    )''')
+
+MIGRATIONS = [
+    (1, _create_base_tables),
+    (2, _add_customer_payment),
+    (3, _create_indexes),
+    (4, _create_occupancy_rollup),
+    (5, _create_customer_search),
+    (6, _create_change_log),
+    (7, _add_customer_search_insert_trigger),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version():
+    result = execute_query('PRAGMA user_version', fetch=True)
+    return result[0][0] if result else 0
+
+def migrate(target=SCHEMA_VERSION):
+    """Apply every migration newer than the database's user_version, up to target."""
+    # Reading user_version needs no lock; only a database that is behind
+    # takes the write lock (and re-reads the version under it).
+    version = get_schema_version()
+    if version < target:
+        with transaction(immediate=True) as tx:
+            version = tx.execute('PRAGMA user_version', fetch=True)[0][0]
+            for migration_version, migration in MIGRATIONS:
+                if version < migration_version <= target:
+                    migration(tx)
+                    tx.execute(f'PRAGMA user_version = {migration_version}')
+                    version = migration_version
+    _migrate_archive()
+    return version
+
+# Database files create_tables() has brought up to date since the last configure_pool().
+_migrated = set()
+
 def create_tables():
-    conn = create_connection()
-    if conn is None:
+    """Bring the database up to SCHEMA_VERSION; after the first call this is a no-op."""
+    database = current_pool().database
+    if database in _migrated:
         return
     try:
-        with conn:
-            cursor = conn.cursor()
-            
-            # Create rooms table
-            cursor.execute(''' 
-            CREATE TABLE IF NOT EXISTS rooms (
-                roomNumber INTEGER PRIMARY KEY,
-                roomType TEXT,
-                price INTEGER,
-                availability BOOLEAN
-            )''')
-            
-            # Create customers table
-            cursor.execute(''' 
-            CREATE TABLE IF NOT EXISTS customers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT,
-                contact TEXT
-            )''')
+        migrate()
+        _migrated.add(database)
     except sqlite3.Error as e:
         print(f"Error creating tables: {e}")
+
+# Properties
+#
+# Each hotel of the chain can keep its data in its own database file,
+# <property directory>/<property id>.db, with its own connection pool, so one
+# property's writes never wait on another's write lock. Inside
+# `with use_property(property_id):` every Models call made on this thread goes
+# to that property's database; outside it, calls use the default database.
+# for_each_property() runs a reader against several properties in parallel and
+# returns the results per property for the caller to merge.
+
+PROPERTY_DIRECTORY = 'properties'
+PROPERTY_ID = re.compile(r'[A-Za-z0-9_-]{1,64}')
+FANOUT_WORKERS = 8
+
+_property_pools = {}
+_property_lock = threading.Lock()
+_pool_options = {}
+_property_directory = PROPERTY_DIRECTORY
+
+def property_database(property_id):
+    if not isinstance(property_id, str) or not PROPERTY_ID.fullmatch(property_id):
+        raise ValueError(f"Invalid property id: {property_id!r}")
+    return os.path.join(_property_directory, f'{property_id}.db')
+
+def _property_pool(property_id, create):
+    database = property_database(property_id)
+    with _property_lock:
+        property_pool = _property_pools.get(property_id)
+        if property_pool is None:
+            if not create and not os.path.exists(database):
+                raise ValueError(f"Unknown property: {property_id}")
+            os.makedirs(_property_directory, exist_ok=True)
+            property_pool = _property_pools[property_id] = _open_pool(database, **_pool_options)
+        return property_pool
+
+@contextmanager
+def use_property(property_id, create=False):
+    """Route this thread's Models calls to property_id's database inside the block.
+
+    Raises ValueError for an unknown property unless create is set, which
+    creates its database.
+    """
+    property_pool = _property_pool(property_id, create)
+    saved = (current_property(), getattr(_property_state, 'pool', None), getattr(_tx_state, 'tx', None))
+    _property_state.property_id = property_id
+    _property_state.pool = property_pool
+    # A transaction belongs to one database; the property's calls start their own.
+    _tx_state.tx = None
+    try:
+        create_tables()
+        yield property_pool
     finally:
-        conn.close()
+        _property_state.property_id, _property_state.pool, _tx_state.tx = saved
+
+def add_property(property_id):
+    """Create a property's database (if it does not exist yet) with the current schema."""
+    with use_property(property_id, create=True):
+        pass
+    return property_id
+
+def pool_stats():
+    """{property id: its pool's stats()}, with the default database under None."""
+    with _property_lock:
+        pools = dict(_property_pools)
+    stats = {None: pool.stats()}
+    stats.update((property_id, property_pool.stats()) for property_id, property_pool in sorted(pools.items()))
+    return stats
+
+def list_properties():
+    """IDs of the properties that have a database, sorted."""
+    try:
+        names = os.listdir(_property_directory)
+    except FileNotFoundError:
+        return []
+    return sorted(name[:-3] for name in names
+                  if name.endswith('.db') and PROPERTY_ID.fullmatch(name[:-3]))
+
+def for_each_property(fn, *args, property_ids=None, **kwargs):
+    """Call fn(*args, **kwargs) for each property, in parallel; returns {property id: result}."""
+    property_ids = list_properties() if property_ids is None else list(property_ids)
+    if not property_ids:
+        return {}
+    from concurrent.futures import ThreadPoolExecutor  # kept off the import path (bench_startup.py)
+
+    def run(property_id):
+        with use_property(property_id):
+            return fn(*args, **kwargs)
+
+    with ThreadPoolExecutor(min(FANOUT_WORKERS, len(property_ids)), thread_name_prefix='hotel-fanout') as executor:
+        return dict(zip(property_ids, executor.map(run, property_ids)))
+
+# Archive
+#
+# Stays that checked out more than ARCHIVE_AFTER_DAYS ago are moved out of
+# `reservations` into the same table in the database's archive file
+# (archive_database(), attached to every connection as `archive`). The hot
+# table then only holds recent and upcoming stays, and queries on it do not
+# slow down as years of history pile up. archive_reservations() moves stays in batches of
+# ARCHIVE_BATCH_SIZE, each batch one short write transaction, and pauses
+# between batches so bookings get the write lock. reservationArchive.py runs it
+# on a schedule. The occupancy rollup already counts archived nights, so it is
+# not changed.
+#
+# Readers use the hot table only. When a date range starts before
+# archived_until(), they read hot and archived stays together (ALL_STAYS).
+# Bills without a date range always do. With WAL the two databases do not
+# commit atomically, so a crash during a move can leave a stay in both.
+# Readers skip the archived copy of a stay that is still hot, and the next
+# archive run removes the stay from the hot table.
+
+ARCHIVE_AFTER_DAYS = 365
+ARCHIVE_BATCH_SIZE = 200
+ARCHIVE_PAUSE = 0.02
+ARCHIVE_SCHEMA_VERSION = 1
+
+STAY_COLUMNS = 'id, customer_id, roomNumber, checkIn, checkOut'
+ARCHIVED_STAYS = f'''(
+    SELECT {STAY_COLUMNS} FROM archive.reservations a
+    WHERE NOT EXISTS (SELECT 1 FROM main.reservations h WHERE h.id = a.id)
+)'''
+ALL_STAYS = f'''(
+    SELECT {STAY_COLUMNS} FROM main.reservations
+    UNION ALL
+    SELECT {STAY_COLUMNS} FROM archive.reservations a
+    WHERE NOT EXISTS (SELECT 1 FROM main.reservations h WHERE h.id = a.id)
+)'''
+
+def _create_archive_tables(tx):
+    # Same columns (and ids) and indexes as the hot table.
+    tx.execute('''
+    CREATE TABLE IF NOT EXISTS archive.reservations (
+        id INTEGER PRIMARY KEY,
+        customer_id INTEGER,
+        roomNumber INTEGER,
+        checkIn TEXT,
+        checkOut TEXT
+    )''')
+    tx.execute('CREATE INDEX IF NOT EXISTS archive.idx_archive_customer ON reservations(customer_id)')
+    tx.execute('CREATE INDEX IF NOT EXISTS archive.idx_archive_room_dates ON reservations(roomNumber, checkIn, checkOut)')
+    tx.execute('CREATE INDEX IF NOT EXISTS archive.idx_archive_dates ON reservations(checkOut, checkIn, roomNumber)')
+
+def _migrate_archive():
+    # The archive is its own file, versioned by its own user_version.
+    result = execute_query('PRAGMA archive.user_version', fetch=True)
+    if result and result[0][0] >= ARCHIVE_SCHEMA_VERSION:
+        return
+    with transaction(immediate=True) as tx:
+        _create_archive_tables(tx)
+        tx.execute(f'PRAGMA archive.user_version = {ARCHIVE_SCHEMA_VERSION}')
+
+def archived_until():
+    """Latest checkOut in the archive, or None while it is empty."""
+    result = execute_query('SELECT MAX(checkOut) FROM archive.reservations', fetch=True)
+    return result[0][0] if result else None
+
+def stays_table(check_in=None):
+    """Table to read the stays ending after check_in from: the hot table, or ALL_STAYS.
+
+    check_in None means every stay on record.
+    """
+    until = archived_until()
+    if until is not None and (check_in is None or check_in < until):
+        return ALL_STAYS
+    return 'reservations'
+
+def archive_reservations(horizon_days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, pause=ARCHIVE_PAUSE):
+    """Move the stays that checked out more than horizon_days ago to the archive.
+
+    Returns the number of stays moved.
+    """
+    if horizon_days < 0:
+        raise ValueError("horizon_days must be zero or more")
+    cutoff = (date.today() - timedelta(days=horizon_days)).isoformat()
+    moved = 0
+    while True:
+        count = run_with_retry(lambda: _archive_batch(cutoff, batch_size))
+        moved += count
+        if count < batch_size:
+            return moved
+        time.sleep(pause)
+
+def _archive_batch(cutoff, batch_size):
+    with transaction(immediate=True) as tx:
+        ids = [row[0] for row in tx.execute('SELECT id FROM reservations WHERE checkOut < ? ORDER BY checkOut LIMIT ?',
+                                            (cutoff, batch_size), fetch=True)]
+        if not ids:
+            return 0
+        condition = f"id IN ({', '.join('?' * len(ids))})"
+        # OR IGNORE: a stay copied by an interrupted run is only deleted this time.
+        tx.execute(f'INSERT OR IGNORE INTO archive.reservations ({STAY_COLUMNS}) '
+                   f'SELECT {STAY_COLUMNS} FROM main.reservations WHERE {condition}', ids)
+        _log_changes(tx, 'reservation', condition, ids)
+        tx.execute(f'DELETE FROM main.reservations WHERE {condition}', ids)
+    return len(ids)
+
+def _drop_archived(tx, condition, params):
+    """Delete the archived stays matching condition and their nights from the rollup.
+
+    Run before the hot stays are deleted, so an interrupted move is not counted twice.
+    """
+    _rollup_stays(tx, -1, condition, params, stays=ARCHIVED_STAYS)
+    tx.execute(f'DELETE FROM archive.reservations WHERE {condition}', params)
 
 # Utility Functions
 
@@ -53,125 +551,889 @@ def update_data(data, condition_fn, update_fn):
 
 def execute_query(query, params=(), fetch=False, many=False):
     """Helper function to execute database queries safely."""
+    conn = create_connection()
+    if conn is None:
+        metrics.observe_error()
+        cache.discard()
+        return None
     try:
-        conn = create_connection()
-        if conn is None:
-            return None
-        cursor = conn.cursor()
-        if many:
-            cursor.executemany(query, params)
-        else:
-            cursor.execute(query, params)
-        if fetch:
-            result = cursor.fetchall()
-        else:
-            result = None
-        conn.commit()
-        conn.close()
+        result = _run_statement(conn, query, params, fetch, many)
+        if not fetch:
+            # Inside a transaction the change is only visible once it commits.
+            tx = getattr(_tx_state, 'tx', None)
+            if tx is not None:
+                tx.dirty = True
+            else:
+                _data_changed()
         return result
     except sqlite3.Error as e:
         print(f"Database query error: {e}")
+        # The reader calling this turns None into an empty result; don't cache that.
+        metrics.observe_error()
+        cache.discard()
         return None
+    finally:
+        release_connection()
     
-def get_rooms():
-    query = 'SELECT * FROM rooms'
-    result = execute_query(query, fetch=True)
-    if result is None:
-        return []
-    return [{"roomNumber": room[0], "roomType": room[1], "price": room[2], "availability": room[3]} for room in result]
+# Listing queries
+#
+# The get_* listings push filtering, projection and keyset pagination into SQL:
+# `after` is the last key of the previous page, `limit` the page size and
+# `fields` the columns to return (the key column is always included so the
+# caller can ask for the next page).
+
+# A room is available unless a stay covers today. It is worked out when the
+# rooms are read, not kept in rooms.availability (which only records what the
+# room was added with), so it follows the calendar without any write: a
+# booking starts and ends on its own dates. The hot table is enough, since
+# only stays that ended long ago are archived.
+ROOM_AVAILABLE = '''NOT EXISTS (
+    SELECT 1 FROM reservations stay WHERE stay.roomNumber = rooms.roomNumber
+    AND stay.checkIn <= date('now', 'localtime') AND stay.checkOut > date('now', 'localtime'))'''
+
+ROOM_COLUMNS = {
+    'roomNumber': 'roomNumber',
+    'roomType': 'roomType',
+    'price': 'price',
+    'availability': ROOM_AVAILABLE,
+}
+
+CUSTOMER_COLUMNS = {
+    'id': 'id',
+    'name': 'name',
+    'contact': 'contact',
+    'payment': 'payment',
+}
 
-def get_customers():
-    query = 'SELECT * FROM customers'
-    result = execute_query(query, fetch=True)
+RESERVATION_COLUMNS = {
+    'id': 'res.id',
+    'roomNumber': 'r.roomNumber',
+    'roomType': 'r.roomType',
+    'customer_id': 'res.customer_id',
+    'checkIn': 'res.checkIn',
+    'checkOut': 'res.checkOut',
+}
+
+def _projected_columns(columns, key, fields):
+    if not fields:
+        return list(columns)
+    unknown = [field for field in fields if field not in columns]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return [key] + [field for field in columns if field in fields and field != key]
+
+def _prefix_range(prefix):
+    """Bounds so that `col >= lo AND col < hi` matches strings starting with prefix."""
+    return prefix, prefix + '\U0010ffff'
+
+def _build_select(source, columns, key, fields=None, filters=(), after=None, limit=None):
+    """Build the SELECT for a listing, filtered and keyset-paginated on key.
+
+    filters is a sequence of (sql_condition, params) pairs; pairs whose params
+    are None are skipped. Returns (query, params, selected column names).
+    """
+    selected = _projected_columns(columns, key, fields)
+    conditions, params = [], []
+    for condition, values in filters:
+        if values is None:
+            continue
+        conditions.append(condition)
+        params.extend(values if isinstance(values, tuple) else (values,))
+    if after is not None:
+        conditions.append(f'{columns[key]} > ?')
+        params.append(after)
+    query = f"SELECT {', '.join(columns[name] for name in selected)} FROM {source}"
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += f' ORDER BY {columns[key]}'
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(limit)
+    return query, tuple(params), selected
+
+def _paged_select(source, columns, key, fields=None, filters=(), after=None, limit=None):
+    query, params, selected = _build_select(source, columns, key, fields, filters, after, limit)
+    result = execute_query(query, params, fetch=True)
     if result is None:
         return []
-    return [{"id": customer[0], "name": customer[1], "contact": customer[2], "payment": customer[3]} for customer in result]
+    return [dict(zip(selected, row)) for row in result]
 
-def get_reservations():
-    query = '''
-        SELECT 
-            r.roomNumber, 
-            r.roomType, 
-            res.customer_id, 
-            res.checkIn, 
-            res.checkOut
-        FROM 
-            reservations res
-        JOIN 
-            rooms r 
-        ON 
-            res.roomNumber = r.roomNumber;
-    '''
-    result = execute_query(query,fetch=True)
-    if result is None:
+def _iter_select(source, columns, key, fields=None, filters=(), batch_size=1000):
+    """Return a generator over a listing's rows, fetching batch_size rows at a time.
+
+    The query is built (and fields validated) up front; the pooled connection
+    stays checked out from the first row until the generator is exhausted or
+    closed, so memory use does not grow with the size of the table.
+    """
+    query, params, selected = _build_select(source, columns, key, fields, filters)
+    rows_pool = current_pool()
+
+    def rows():
+        conn = rows_pool.acquire()
+        count = 0
+        # Recorded as time spent in SQLite only, not while the consumer holds a row.
+        elapsed = 0.0
+        try:
+            started = time.perf_counter()
+            cursor = conn.execute(query, params)
+            while True:
+                batch = cursor.fetchmany(batch_size)
+                elapsed += time.perf_counter() - started
+                if not batch:
+                    break
+                count += len(batch)
+                for row in batch:
+                    yield dict(zip(selected, row))
+                started = time.perf_counter()
+        finally:
+            rows_pool.release()
+            metrics.observe_query(query, count, elapsed)
+
+    return rows()
+
+@cache.cached
+def get_rooms(after=None, limit=None, room_type=None, min_price=None, max_price=None,
+              availability=None, fields=None):
+    inventory = get_room_inventory()
+    if inventory is not None:
+        selected = _projected_columns(ROOM_COLUMNS, 'roomNumber', fields)
+        rows = inventory.rows(room_type, min_price, max_price, availability, after=after, limit=limit)
+        return [{name: row[name] for name in selected} for row in rows]
+    filters = (
+        ('roomType = ?', room_type),
+        ('price >= ?', min_price),
+        ('price <= ?', max_price),
+        (f'{ROOM_AVAILABLE} = ?', availability),
+    )
+    return _paged_select('rooms', ROOM_COLUMNS, 'roomNumber', fields, filters, after, limit)
+
+def _customer_filters(name_prefix):
+    return (
+        ('name >= ? AND name < ?', _prefix_range(name_prefix) if name_prefix else None),
+    )
+
+@cache.cached
+def get_customers(after=None, limit=None, name_prefix=None, fields=None):
+    filters = _customer_filters(name_prefix)
+    return _paged_select('customers', CUSTOMER_COLUMNS, 'id', fields, filters, after, limit)
+
+# Customer search
+#
+# search_customers() ranks exact name/contact matches first, then
+# case-insensitive name and contact prefixes, then (where FTS5 is available)
+# full-text matches on any word of the name or contact, so "smi" finds
+# "John Smith". Each step is an index lookup capped at the result limit.
+
+MAX_SEARCH_RESULTS = 100
+
+def _has_fulltext():
+    result = execute_query("SELECT 1 FROM sqlite_master WHERE name = 'customers_fts'", fetch=True)
+    return bool(result)
+
+def _fulltext_query(q):
+    # Every word must match as a prefix; quoting keeps FTS5 syntax out of user input.
+    words = q.split()
+    return ' '.join('"' + word.replace('"', '""') + '"*' for word in words)
+
+@cache.cached
+def search_customers(q, limit=20):
+    """Customers matching q, best matches first; each row carries a 'match' kind."""
+    q = q.strip()
+    if not q:
         return []
-    return [{"roomNumber": row[0], "roomType": row[1], "customer_id": row[2], "checkIn": row[3], "checkOut":row[4]}for row in result]
+    limit = min(limit, MAX_SEARCH_RESULTS)
+    select = 'SELECT id, name, contact, payment FROM customers'
+    low, high = _prefix_range(q)
+    steps = [
+        ('exact', f'{select} WHERE name = ? COLLATE NOCASE ORDER BY id LIMIT ?', (q,)),
+        ('exact', f'{select} WHERE contact = ? ORDER BY id LIMIT ?', (q,)),
+        ('prefix', f'''{select} WHERE name >= ? COLLATE NOCASE AND name < ? COLLATE NOCASE
+                       ORDER BY name COLLATE NOCASE, id LIMIT ?''', (low, high)),
+        ('prefix', f'{select} WHERE contact >= ? AND contact < ? ORDER BY contact, id LIMIT ?', (low, high)),
+    ]
+    if _has_fulltext():
+        steps.append(('fulltext', f'''{select} WHERE id IN (
+                          SELECT rowid FROM customers_fts WHERE customers_fts MATCH ? ORDER BY rank LIMIT ?)''',
+                      (_fulltext_query(q),)))
+    found = {}
+    for match, query, params in steps:
+        for row in execute_query(query, params + (limit,), fetch=True) or []:
+            if row[0] not in found:
+                found[row[0]] = dict(zip(('id', 'name', 'contact', 'payment', 'match'), row + (match,)))
+        if len(found) >= limit:
+            break
+    return list(found.values())[:limit]
+
+RESERVATION_SOURCE = 'reservations res JOIN rooms r ON res.roomNumber = r.roomNumber'
+
+def _reservation_source(check_in, check_out):
+    # Without a date range only the hot table is listed; see "Archive".
+    if check_in is None and check_out is None:
+        return RESERVATION_SOURCE
+    return f'{stays_table(check_in)} res JOIN rooms r ON res.roomNumber = r.roomNumber'
+
+def _reservation_filters(customer_id, room_number, check_in=None, check_out=None):
+    return (
+        ('res.customer_id = ?', customer_id),
+        ('res.roomNumber = ?', room_number),
+        ('res.checkOut > ?', check_in),
+        ('res.checkIn < ?', check_out),
+    )
 
+@cache.cached
+def get_reservations(after=None, limit=None, customer_id=None, room_number=None, fields=None,
+                     check_in=None, check_out=None):
+    """Reservations, optionally only the stays overlapping [check_in, check_out) (either may be None)."""
+    filters = _reservation_filters(customer_id, room_number, check_in, check_out)
+    source = _reservation_source(check_in, check_out)
+    return _paged_select(source, RESERVATION_COLUMNS, 'id', fields, filters, after, limit)
+
+def iter_customers(name_prefix=None, fields=None, batch_size=1000):
+    filters = _customer_filters(name_prefix)
+    return _iter_select('customers', CUSTOMER_COLUMNS, 'id', fields, filters, batch_size)
+
+def iter_reservations(customer_id=None, room_number=None, fields=None, batch_size=1000,
+                      check_in=None, check_out=None):
+    filters = _reservation_filters(customer_id, room_number, check_in, check_out)
+    source = _reservation_source(check_in, check_out)
+    return _iter_select(source, RESERVATION_COLUMNS, 'id', fields, filters, batch_size)
+
+@cache.cached
 def get_reservations_for_customer(customer_id):
     query = '''
-        SELECT r.roomNumber, r.roomType, res.checkIn, res.checkOut
+        SELECT res.id, res.roomNumber, r.roomType, res.checkIn, res.checkOut
         FROM reservations res
         JOIN rooms r ON res.roomNumber = r.roomNumber
         WHERE res.customer_id = ?
+        ORDER BY res.id
     '''
     data = execute_query(query, (customer_id,), fetch=True)
     if data is None:
         return []
-    result = data[0]
-    return {"roomNumber": result[0], "roomType": result[1], "customer_id": customer_id, "checkIn": result[2], "checkOut":result[3]}
+    return [{"id": row[0], "roomNumber": row[1], "roomType": row[2], "customer_id": customer_id,
+             "checkIn": row[3], "checkOut": row[4]} for row in data]
+
+@cache.cached
+def get_customers_with_reservations(after=None, limit=None, name_prefix=None, fields=None):
+    """Customers (paginated like get_customers), each with a "reservations" list, from one JOIN."""
+    customers_query, params, selected = _build_select(
+        'customers', CUSTOMER_COLUMNS, 'id', fields, _customer_filters(name_prefix), after, limit)
+    query = f'''
+        SELECT c.*, res.id, res.roomNumber, r.roomType, res.checkIn, res.checkOut
+        FROM ({customers_query}) c
+        LEFT JOIN reservations res ON res.customer_id = c.id
+        LEFT JOIN rooms r ON r.roomNumber = res.roomNumber
+        ORDER BY c.id, res.id
+    '''
+    data = execute_query(query, params, fetch=True)
+    if data is None:
+        return []
+    width = len(selected)
+    customers = []
+    for _, rows in groupby(data, key=lambda row: row[0]):
+        rows = list(rows)
+        customer = dict(zip(selected, rows[0][:width]))
+        customer["reservations"] = [
+            {"id": row[width], "roomNumber": row[width + 1], "roomType": row[width + 2],
+             "customer_id": customer["id"], "checkIn": row[width + 3], "checkOut": row[width + 4]}
+            for row in rows if row[width] is not None
+        ]
+        customers.append(customer)
+    return customers
+
+# Availability
+#
+# A room is free for [check_in, check_out) when none of its reservations
+# overlaps that range (dates are ISO strings, so they compare as text). The
+# overlap test is answered from idx_reservations_dates: only stays ending after
+# check_in are visited, however much history the table holds. Ranges starting
+# before archived_until() are checked against archived stays as well.
+
+OVERLAP_CONDITION = 'checkOut > ? AND checkIn < ?'
+
+@cache.cached
+def get_available_rooms(check_in, check_out):
+    """Rooms with no reservation overlapping the check_in..check_out stay."""
+    inventory = get_room_inventory()
+    if inventory is not None:
+        booked = execute_query(f'SELECT roomNumber FROM {stays_table(check_in)} WHERE {OVERLAP_CONDITION}',
+                               (check_in, check_out), fetch=True)
+        if booked is not None:
+            return inventory.rows(exclude={row[0] for row in booked})
+    query = f'''
+        SELECT roomNumber, roomType, price, {ROOM_AVAILABLE}
+        FROM rooms
+        WHERE roomNumber NOT IN (
+            SELECT roomNumber FROM {stays_table(check_in)} WHERE {OVERLAP_CONDITION}
+        )
+        ORDER BY roomNumber
+    '''
+    result = execute_query(query, (check_in, check_out), fetch=True)
+    if result is None:
+        return []
+    return [{"roomNumber": room[0], "roomType": room[1], "price": room[2], "availability": room[3]} for room in result]
+
+def is_room_available(room_number, check_in, check_out):
+    query = f'SELECT 1 FROM {stays_table(check_in)} WHERE roomNumber = ? AND {OVERLAP_CONDITION} LIMIT 1'
+    return not execute_query(query, (room_number, check_in, check_out), fetch=True)
+
+def get_chain_available_rooms(check_in, check_out, property_ids=None):
+    """get_available_rooms() across properties, each room tagged with its 'property'."""
+    results = for_each_property(get_available_rooms, check_in, check_out, property_ids=property_ids)
+    return [dict(room, property=property_id) for property_id, rooms in results.items() for room in rooms]
+
+def _stay_covers_today(check_in, check_out):
+    today = date.today().isoformat()
+    return check_in <= today < check_out
+
+# Occupancy rollups
+#
+# daily_occupancy holds, per night and room type, the rooms occupied, the
+# stays arriving and the room revenue. Every write that adds, shortens or
+# removes stays adjusts it in the same transaction, so reports read one row
+# per day and type instead of scanning reservations. rebuild_occupancy()
+# recomputes it from scratch (after a manual edit or a price change).
+
+def _rollup_stays(tx, sign, condition='1', params=(), since=None, stays='reservations'):
+    """Add (sign=1) or subtract (sign=-1) the nights of the stays matching condition.
+
+    With since, only nights from that day on are counted. Must run while the
+    stays and their rooms are still in the database. stays is the table to
+    read them from (see "Archive").
+    """
+    first_night = 'MAX(checkIn, ?)' if since is not None else 'checkIn'
+    query = f'''
+        WITH RECURSIVE nights(roomNumber, day, checkIn, checkOut) AS (
+            SELECT roomNumber, {first_night}, checkIn, checkOut FROM {stays}
+            WHERE ({condition}) AND checkIn < checkOut
+            UNION ALL
+            SELECT roomNumber, date(day, '+1 day'), checkIn, checkOut FROM nights
+            WHERE date(day, '+1 day') < checkOut
+        )
+        INSERT INTO daily_occupancy (day, roomType, occupied, arrivals, revenue)
+        SELECT n.day, r.roomType, ? * COUNT(*), ? * SUM(n.day = n.checkIn), ? * SUM(r.price)
+        FROM nights n JOIN rooms r ON r.roomNumber = n.roomNumber
+        WHERE n.day < n.checkOut
+        GROUP BY n.day, r.roomType
+        ON CONFLICT (day, roomType) DO UPDATE SET
+            occupied = occupied + excluded.occupied,
+            arrivals = arrivals + excluded.arrivals,
+            revenue = revenue + excluded.revenue
+    '''
+    leading = (since,) if since is not None else ()
+    tx.execute(query, leading + tuple(params) + (sign, sign, sign))
+
+def rebuild_occupancy():
+    """Recompute daily_occupancy from every reservation on record."""
+    with transaction(immediate=True) as tx:
+        tx.execute('DELETE FROM daily_occupancy')
+        _rollup_stays(tx, 1, stays=ALL_STAYS)
+        # No entity changed, but the reports did: move data_version() on.
+        _log_reset(tx, 'occupancy')
+        return tx.execute('SELECT COUNT(*) FROM daily_occupancy', fetch=True)[0][0]
+
+# Change feed
+#
+# Every write appends the keys of the rooms, customers and reservations it
+# adds, changes or removes to the `changes` table, in the same transaction, so
+# the sequence numbers follow commit order. get_changes(since) returns each key
+# changed after `since` once, with its current row (or as deleted), and a
+# client that applies them stays in sync without re-reading whole lists. Bulk
+# loads log one 'reset' per entity instead of a row per key, as does a cursor
+# older than the retained log: the client reloads that list. The log keeps the
+# last CHANGE_LOG_SIZE entries. A room's availability also changes when a stay
+# starts or ends on its own dates, which logs nothing (see ROOM_AVAILABLE);
+# data_marker() covers that for caches.
+
+CHANGE_SOURCES = {
+    # entity: (table, key column, listing source, listing columns)
+    'room': ('rooms', 'roomNumber', 'rooms', ROOM_COLUMNS),
+    'customer': ('customers', 'id', 'customers', CUSTOMER_COLUMNS),
+    'reservation': ('reservations', 'id', RESERVATION_SOURCE, RESERVATION_COLUMNS),
+}
+CHANGE_LOG_SIZE = 100000
+CHANGE_PAGE_SIZE = 1000
+CHANGE_POLL_INTERVAL = 1.0  # also picks up writes made by other processes
+PRUNE_EVERY = 1000
+
+_change_signal = threading.Condition()
+_change_generation = 0
+_logged_since_prune = 0
+
+def _log_changes(tx, entity, condition='1', params=()):
+    """Log the entity rows matching condition as changed; log them before deleting them."""
+    global _logged_since_prune
+    table, key = CHANGE_SOURCES[entity][:2]
+    tx.execute(f'INSERT INTO changes (entity, key) SELECT ?, {key} FROM {table} WHERE {condition}',
+               (entity,) + tuple(params))
+    _logged_since_prune += 1
+    if _logged_since_prune >= PRUNE_EVERY:
+        _logged_since_prune = 0
+        tx.execute('DELETE FROM changes WHERE seq <= (SELECT MAX(seq) FROM changes) - ?', (CHANGE_LOG_SIZE,))
+
+def _log_reset(tx, entity):
+    tx.execute('INSERT INTO changes (entity, key) VALUES (?, NULL)', (entity,))
+
+def data_version():
+    """Latest change sequence number: changes with every logged write, whichever process made it.
+
+    The API's ETags and the reader cache are keyed on it (see data_marker()).
+    None if it cannot be read.
+    """
+    conn = create_connection()
+    if conn is None:
+        return None
+    try:
+        return conn.execute('SELECT IFNULL(MAX(seq), 0) FROM changes').fetchone()[0]
+    except sqlite3.Error:
+        return None
+    finally:
+        release_connection()
+
+def data_marker():
+    """What every read depends on: (data_version(), today), None if it cannot be read.
+
+    Availability is worked out from today's date, so reads change with the day
+    even when nothing is written.
+    """
+    version = data_version()
+    return None if version is None else (version, date.today().isoformat())
+
+def latest_change():
+    result = execute_query('SELECT IFNULL(MAX(seq), 0), IFNULL(MIN(seq), 1) FROM changes', fetch=True)
+    return result[0] if result else (0, 1)
+
+def get_changes(since=0, limit=CHANGE_PAGE_SIZE, entities=None):
+    """Changes committed after sequence number `since`, oldest first.
+
+    Returns {'last', 'reset', 'changes'}. Each change is {'seq', 'entity',
+    'key', 'op', 'data'} with op 'upsert' (data is the current row), 'delete'
+    or 'reset' (reload every row of the entity). reset is True when `since`
+    is not in the retained log and everything must be reloaded. Pass 'last'
+    as `since` next time.
+    """
+    last, oldest = latest_change()
+    if since > last or since < oldest - 1:
+        return {'last': last, 'reset': True, 'changes': []}
+    entities = list(entities or CHANGE_SOURCES)
+    unknown = [entity for entity in entities if entity not in CHANGE_SOURCES]
+    if unknown:
+        raise ValueError(f"Unknown entities: {', '.join(unknown)}")
+    query = f'''
+        SELECT entity, key, MAX(seq) AS latest FROM changes
+        WHERE seq > ? AND seq <= ? AND entity IN ({', '.join('?' * len(entities))})
+        GROUP BY entity, key
+        ORDER BY latest
+        LIMIT ?
+    '''
+    rows = execute_query(query, (since, last, *entities, limit), fetch=True) or []
+    rows_by_entity = {}
+    for entity, keys in groupby(sorted((row[0], row[1]) for row in rows if row[1] is not None), lambda row: row[0]):
+        _, key, source, columns = CHANGE_SOURCES[entity]
+        keys = tuple(row[1] for row in keys)
+        current = []
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            current += _paged_select(source, columns, key,
+                                     filters=[(f"{columns[key]} IN ({', '.join('?' * len(chunk))})", chunk)])
+        rows_by_entity[entity] = {row[key]: row for row in current}
+    changes = []
+    for entity, key, seq in rows:
+        if key is None:
+            changes.append({'seq': seq, 'entity': entity, 'key': None, 'op': 'reset', 'data': None})
+            continue
+        data = rows_by_entity[entity].get(key)
+        changes.append({'seq': seq, 'entity': entity, 'key': key,
+                        'op': 'delete' if data is None else 'upsert', 'data': data})
+    # A short page means everything up to `last` was seen.
+    if len(rows) == limit:
+        last = rows[-1][2]
+    return {'last': last, 'reset': False, 'changes': changes}
+
+def wait_for_changes(since, timeout, poll_interval=CHANGE_POLL_INTERVAL):
+    """Block until a change after `since` is committed, or timeout seconds pass.
+
+    Returns the latest sequence number. Commits made in this process wake the
+    caller at once; others are noticed within poll_interval.
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        with _change_signal:
+            generation = _change_generation
+        last = latest_change()[0]
+        remaining = deadline - time.monotonic()
+        if last != since or remaining <= 0:
+            return last
+        with _change_signal:
+            _change_signal.wait_for(lambda: _change_generation != generation, min(remaining, poll_interval))
+
+# The write functions below each run one IMMEDIATE transaction, retried while
+# SQLite is busy (see run_with_retry), so concurrent writers queue on the
+# write lock instead of failing. They print what happened, as the CLIs expect,
+# and return False if the write failed so that the APIs can answer with an
+# error instead of reporting success.
 
 def add_room_to_db(room_number, room_type, price, availability):
     query = 'INSERT INTO rooms (roomNumber, roomType, price, availability) VALUES (?, ?, ?, ?)'
-    execute_query(query, (room_number, room_type, price, availability))
+
+    def write():
+        with transaction(immediate=True) as tx:
+            tx.execute(query, (room_number, room_type, price, availability))
+            _log_changes(tx, 'room', 'roomNumber = ?', (room_number,))
+
+    try:
+        run_with_retry(write)
+    except sqlite3.Error as e:
+        print(f"Database query error: {e}")
+        return False
     print(f"Room {room_number} added successfully!")
+    return True
 
 def add_customer_to_db(name, contact, payment):
     query = 'INSERT INTO customers (name, contact, payment) VALUES (?, ?, ?)'
-    execute_query(query, (name, contact, payment))
 
-def add_reservation_to_db(customer_name, room_number, check_in, check_out):
-    customer_query = 'SELECT id FROM customers WHERE name = ?'
-    customer_id_result = execute_query(customer_query, (customer_name,), fetch=True)
-    if not customer_id_result:
-        return "Customer not found."
-    
-    customer_id = customer_id_result[0][0]
-    reservation_query = 'INSERT INTO reservations (customer_id, roomNumber, checkIn, checkOut) VALUES (?, ?, ?, ?)'
-    update_query = 'UPDATE rooms SET availability = ? WHERE roomNumber = ?'
-    
-    execute_query(reservation_query, (customer_id, room_number, check_in, check_out))
-    execute_query(update_query, (False, room_number))
-    return "Reservation added successfully!"
+    def write():
+        with transaction(immediate=True) as tx:
+            tx.execute(query, (name, contact, payment))
+            _log_changes(tx, 'customer', 'id = last_insert_rowid()')
+
+    try:
+        run_with_retry(write)
+    except sqlite3.Error as e:
+        print(f"Database query error: {e}")
+        return False
+    return True
+
+# What add_reservation_to_db returns.
+RESERVATION_ADDED = "Reservation added successfully!"
+CUSTOMER_NOT_FOUND = "Customer not found."
+AMBIGUOUS_CUSTOMER = "Several customers have that name; book by customer ID."
+ROOM_NOT_FOUND = "Room not found."
+ROOM_NOT_AVAILABLE = "Room is not available for those dates."
+RESERVATION_FAILED = "Reservation failed."
+
+def _book_room(tx, customer_id, room_number, check_in, check_out):
+    """Insert the reservation if the room exists and is free; returns None, or why not."""
+    # The checks and the insert are one statement, so no other booking (or
+    # room delete) can slip in between them, whatever the transaction mode.
+    reservation_query = f'''
+        INSERT INTO reservations (customer_id, roomNumber, checkIn, checkOut)
+        SELECT ?, ?, ?, ?
+        WHERE EXISTS (SELECT 1 FROM rooms WHERE roomNumber = ?)
+        AND NOT EXISTS (
+            SELECT 1 FROM {stays_table(check_in)} WHERE roomNumber = ? AND {OVERLAP_CONDITION}
+        )
+    '''
+    inserted = tx.execute(reservation_query, (customer_id, room_number, check_in, check_out,
+                                              room_number, room_number, check_in, check_out))
+    if not inserted:
+        if not tx.execute('SELECT 1 FROM rooms WHERE roomNumber = ?', (room_number,), fetch=True):
+            return ROOM_NOT_FOUND
+        return ROOM_NOT_AVAILABLE
+    _rollup_stays(tx, 1, 'id = last_insert_rowid()')
+    _log_changes(tx, 'reservation', 'id = last_insert_rowid()')
+    # The room's availability changes now only if the stay covers today.
+    if _stay_covers_today(check_in, check_out):
+        _log_changes(tx, 'room', 'roomNumber = ?', (room_number,))
+    return None
+
+def add_reservation_to_db(customer_name, room_number, check_in, check_out, customer_id=None):
+    """Book a room for the customer with this name, or with customer_id when given."""
+    if customer_id is not None:
+        customer_query, customer_key = 'SELECT id FROM customers WHERE id = ?', customer_id
+    else:
+        # Two rows means the name is shared; the caller has to pick by id.
+        customer_query, customer_key = 'SELECT id FROM customers WHERE name = ? LIMIT 2', customer_name
+
+    def book():
+        # IMMEDIATE takes the write lock up front: two bookings queue on the
+        # lock instead of both reading and then failing to upgrade.
+        with transaction(immediate=True) as tx:
+            customer_id_result = tx.execute(customer_query, (customer_key,), fetch=True)
+            if not customer_id_result:
+                return CUSTOMER_NOT_FOUND
+            if len(customer_id_result) > 1:
+                return AMBIGUOUS_CUSTOMER
+            refused = _book_room(tx, customer_id_result[0][0], room_number, check_in, check_out)
+            if refused:
+                return refused
+        return RESERVATION_ADDED
+
+    try:
+        return run_with_retry(book)
+    except sqlite3.Error as e:
+        print(f"Database query error: {e}")
+        return RESERVATION_FAILED
 
 def delete_room_from_db(room_number):
     delete_room_query = 'DELETE FROM rooms WHERE roomNumber = ?'
     delete_reservations_query = 'DELETE FROM reservations WHERE roomNumber = ?'
-    
-    execute_query(delete_reservations_query, (room_number,))
-    execute_query(delete_room_query, (room_number,))
+
+    def write():
+        with transaction(immediate=True) as tx:
+            _rollup_stays(tx, -1, 'roomNumber = ?', (room_number,))
+            _drop_archived(tx, 'roomNumber = ?', (room_number,))
+            _log_changes(tx, 'reservation', 'roomNumber = ?', (room_number,))
+            _log_changes(tx, 'room', 'roomNumber = ?', (room_number,))
+            tx.execute(delete_reservations_query, (room_number,))
+            tx.execute(delete_room_query, (room_number,))
+
+    try:
+        run_with_retry(write)
+    except sqlite3.Error as e:
+        print(f"Database query error: {e}")
+        return False
     print(f"Room {room_number} deleted successfully!")
+    return True
 
 def delete_customer_from_db(customer_id):
-    reservation_query = 'SELECT roomNumber FROM reservations WHERE customer_id = ?'
-    reserved_rooms = execute_query(reservation_query, (customer_id,), fetch=True)
-    if reserved_rooms:
-        for room in reserved_rooms:
-            room_number = room[0]
-            delete_reservation_from_db(room_number)
-    
+    # Drop the customer's reservations as one set-based statement rather than
+    # one delete_reservation_from_db per room. The rooms they occupy tonight
+    # become available, so those are logged as changed.
+    occupied_rooms = 'SELECT roomNumber FROM reservations WHERE customer_id = ? AND checkIn <= ? AND checkOut > ?'
+    delete_reservations_query = 'DELETE FROM reservations WHERE customer_id = ?'
     delete_customer_query = 'DELETE FROM customers WHERE id = ?'
-    execute_query(delete_customer_query, (customer_id,))
+    today = date.today().isoformat()
+    occupied_params = (customer_id, today, today)
+
+    def write():
+        with transaction(immediate=True) as tx:
+            _rollup_stays(tx, -1, 'customer_id = ?', (customer_id,))
+            _drop_archived(tx, 'customer_id = ?', (customer_id,))
+            _log_changes(tx, 'room', f'roomNumber IN ({occupied_rooms})', occupied_params)
+            _log_changes(tx, 'reservation', 'customer_id = ?', (customer_id,))
+            _log_changes(tx, 'customer', 'id = ?', (customer_id,))
+            tx.execute(delete_reservations_query, (customer_id,))
+            tx.execute(delete_customer_query, (customer_id,))
+
+    try:
+        run_with_retry(write)
+    except sqlite3.Error as e:
+        print(f"Database query error: {e}")
+        return False
     print(f"Customer with ID {customer_id} and their reservations deleted successfully!")
+    return True
 
 def delete_reservation_from_db(room_number):
-    delete_reservation_query = 'DELETE FROM reservations WHERE roomNumber = ?'
-    update_room_query = 'UPDATE rooms SET availability = ? WHERE roomNumber = ?'
-    
-    execute_query(delete_reservation_query, (room_number,))
-    execute_query(update_room_query, (True, room_number))
+    # Cancel the room's current stay (the one covering tonight), which frees
+    # the room. Other guests' future bookings and past stays are kept: the
+    # past ones are billing history and part of the occupancy rollup.
+    current_stay = 'roomNumber = ? AND checkIn <= ? AND checkOut > ?'
+    delete_reservation_query = f'DELETE FROM reservations WHERE {current_stay}'
+    today = date.today().isoformat()
+    params = (room_number, today, today)
+
+    def write():
+        with transaction(immediate=True) as tx:
+            _rollup_stays(tx, -1, current_stay, params)
+            _log_changes(tx, 'reservation', current_stay, params)
+            if not tx.execute(delete_reservation_query, params):
+                return False
+            _log_changes(tx, 'room', 'roomNumber = ?', (room_number,))
+        return True
+
+    try:
+        deleted = run_with_retry(write)
+    except sqlite3.Error as e:
+        print(f"Database query error: {e}")
+        return False
+    if not deleted:
+        print(f"Room {room_number} has no current stay.")
+        return None
     print(f"Room {room_number} checked out successfully!")
+    return True
+
+def cancel_reservation(reservation_id):
+    """Cancel one reservation by its id, a future booking as well as a current stay.
+
+    Returns True, None if there is no such reservation, or False if the write failed.
+    """
+    stay = 'id = ?'
+    # Its room, if the stay covers tonight: that room becomes available.
+    occupied_room = 'SELECT roomNumber FROM reservations WHERE id = ? AND checkIn <= ? AND checkOut > ?'
+    today = date.today().isoformat()
+    occupied_params = (reservation_id, today, today)
+
+    def write():
+        with transaction(immediate=True) as tx:
+            _log_changes(tx, 'room', f'roomNumber IN ({occupied_room})', occupied_params)
+            _rollup_stays(tx, -1, stay, (reservation_id,))
+            _log_changes(tx, 'reservation', stay, (reservation_id,))
+            return bool(tx.execute(f'DELETE FROM reservations WHERE {stay}', (reservation_id,)))
+
+    try:
+        cancelled = run_with_retry(write)
+    except sqlite3.Error as e:
+        print(f"Database query error: {e}")
+        return False
+    if not cancelled:
+        print(f"Reservation {reservation_id} not found.")
+        return None
+    print(f"Reservation {reservation_id} cancelled.")
+    return True
 
 def checkout(room_number):
-    update_room_query = 'UPDATE rooms SET availability = ? WHERE roomNumber = ?'
-    execute_query(update_room_query, (True, room_number))
-    print(f"Room {room_number} checked out successfully!")
\ No newline at end of file
+    # End the current stay today so the room shows as free from tonight on.
+    end_stay_query = '''
+        UPDATE reservations SET checkOut = ?
+        WHERE roomNumber = ? AND checkIn <= ? AND checkOut > ?
+    '''
+    today = date.today().isoformat()
+
+    def write():
+        with transaction(immediate=True) as tx:
+            # Give back the nights from today on before the stay is cut short.
+            _rollup_stays(tx, -1, 'roomNumber = ? AND checkIn <= ? AND checkOut > ?',
+                          (room_number, today, today), since=today)
+            _log_changes(tx, 'reservation', 'roomNumber = ? AND checkIn <= ? AND checkOut > ?',
+                         (room_number, today, today))
+            _log_changes(tx, 'room', 'roomNumber = ?', (room_number,))
+            tx.execute(end_stay_query, (today, room_number, today, today))
+
+    try:
+        run_with_retry(write)
+    except sqlite3.Error as e:
+        print(f"Database query error: {e}")
+        return False
+    print(f"Room {room_number} checked out successfully!")
+    return True
+
+# Bulk loading
+#
+# The bulk_add_* functions take any iterable of row tuples (a list, or a
+# generator reading a CSV file) and insert it with executemany, committing
+# every chunk_size rows. A failing chunk is rolled back; the chunks committed
+# before it stay. They return the number of rows inserted, and on failure
+# raise BulkLoadError with the number committed: rows are inserted in order,
+# so that many leading rows are stored and the rest can be sent again.
+
+BULK_CHUNK_SIZE = 5000
+
+class BulkLoadError(Exception):
+    def __init__(self, error, inserted):
+        super().__init__(f"{error} ({inserted} rows were committed before it)")
+        self.error = error
+        self.inserted = inserted
+
+def _chunks(rows, chunk_size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def _bulk_insert(query, rows, chunk_size, after_chunk=None):
+    inserted = 0
+    try:
+        for chunk in _chunks(rows, chunk_size):
+            with transaction() as tx:
+                tx.execute(query, chunk, many=True)
+                if after_chunk is not None:
+                    after_chunk(tx, chunk)
+            inserted += len(chunk)
+    except (ValueError, sqlite3.Error) as e:
+        raise BulkLoadError(e, inserted) from e
+    return inserted
+
+def bulk_add_rooms(rows, chunk_size=BULK_CHUNK_SIZE):
+    """rows: (roomNumber, roomType, price, availability) tuples."""
+    query = 'INSERT INTO rooms (roomNumber, roomType, price, availability) VALUES (?, ?, ?, ?)'
+
+    def after_chunk(tx, chunk):
+        _log_reset(tx, 'room')
+
+    return _bulk_insert(query, rows, chunk_size, after_chunk)
+
+def bulk_add_customers(rows, chunk_size=BULK_CHUNK_SIZE):
+    """rows: (id, name, contact, payment) tuples; id None assigns the next one."""
+    query = 'INSERT INTO customers (id, name, contact, payment) VALUES (?, ?, ?, ?)'
+
+    def after_chunk(tx, chunk):
+        _log_reset(tx, 'customer')
+
+    return _bulk_insert(query, rows, chunk_size, after_chunk)
+
+def bulk_add_reservations(rows, chunk_size=BULK_CHUNK_SIZE):
+    """rows: (customer_id, roomNumber, checkIn, checkOut) tuples.
+
+    Imported stays are not checked for overlaps. Each chunk is added to the occupancy
+    rollup as it is committed; load rooms first, or run rebuild_occupancy()
+    afterwards, since stays of unknown rooms are left out.
+    """
+    query = 'INSERT INTO reservations (customer_id, roomNumber, checkIn, checkOut) VALUES (?, ?, ?, ?)'
+
+    def after_chunk(tx, chunk):
+        # The chunk's rows got the last len(chunk) ids: the write lock is held
+        # and the rows carry no id of their own.
+        _rollup_stays(tx, 1, 'id > last_insert_rowid() - ?', (len(chunk),))
+        _log_reset(tx, 'reservation')
+        # Rooms whose imported stay covers today are no longer available.
+        if any(_stay_covers_today(row[2], row[3]) for row in chunk):
+            _log_reset(tx, 'room')
+
+    return _bulk_insert(query, rows, chunk_size, after_chunk)
+
+# Room inventory
+#
+# A compact in-memory copy of the rooms table (see roomInventory.py), one per
+# property, that get_rooms() and get_available_rooms() filter instead of
+# querying rooms. It is loaded on first use and remembers the change sequence
+# (see "Change feed") it is current to; every use compares that with
+# data_version() and applies the room changes logged since, so writes from
+# other processes show up too. A reset, or a gap longer than a page of the
+# feed, reloads it, as does a new day (availability depends on the date; see
+# ROOM_AVAILABLE). Inside a transaction, and whenever the database cannot be
+# read, callers get None and query the table instead.
+
+_room_inventories = {}
+_room_inventory_lock = threading.Lock()
+
+ROOM_ROWS_QUERY = f'SELECT roomNumber, roomType, price, {ROOM_AVAILABLE} FROM rooms'
+
+def get_room_inventory():
+    if getattr(_tx_state, 'tx', None) is not None:
+        return None
+    property_id = current_property()
+    version = data_version()
+    if version is None:
+        return None
+    today = date.today().isoformat()
+    with _room_inventory_lock:
+        inventory = _room_inventories.get(property_id)
+        # Availability is as of the day the copy was loaded; a new day reloads it.
+        if inventory is not None and inventory.day != today:
+            inventory = None
+        if inventory is not None and inventory.seq != version and not _sync_room_inventory(inventory):
+            inventory = None
+        if inventory is None:
+            rows = execute_query(ROOM_ROWS_QUERY + ' ORDER BY roomNumber', fetch=True)
+            if rows is None:
+                return None
+            inventory = _room_inventories[property_id] = RoomInventory.from_rows(rows)
+            # Read before the rows: a write in between is applied again next time.
+            inventory.seq = version
+            inventory.day = today
+        return inventory
+
+def _sync_room_inventory(inventory):
+    """Apply the room changes logged since inventory.seq; False if it must be reloaded."""
+    feed = get_changes(inventory.seq, entities=('room',))
+    if feed['reset'] or len(feed['changes']) >= CHANGE_PAGE_SIZE:
+        return False
+    for change in feed['changes']:
+        if change['op'] == 'reset':
+            return False
+        if change['op'] == 'delete':
+            inventory.remove(change['key'])
+        else:
+            inventory.upsert(*(change['data'][name] for name in ROOM_COLUMNS))
+    inventory.seq = feed['last']
+    return True
+
+def _reset_room_inventory(property_id=None, everywhere=False):
+    with _room_inventory_lock:
+        if everywhere:
+            _room_inventories.clear()
+        else:
+            _room_inventories.pop(property_id, None)
@@ -1,117 +1,680 @@
-from flask import Flask, request 
+import gzip
+import importlib.util
+import io
+import json
+import logging
+import os
+import queue
+import sqlite3
+import time
+from contextlib import ExitStack
+from functools import lru_cache
+from flask import Flask, Response, g, request, stream_with_context
 import Models as models
+import billing
+import bulkImport
+import reports
+import reservationArchive
+import writeBehind
 from flask_cors import CORS
-from flask_restful import Resource,Api,reqparse,fields,marshal_with
+from flask_restful import Resource,Api,abort
+from queryCache import QueryCache
+from schemas import (Arg, Invalid, RequestSchema, Serializer, bill_fields, boolean, comma_list,
+                     customer_reservations_fields, customer_search_fields, customers_args, customers_fields,
+                     int_range, integer, iso_date, natural, reservation_fields, reservations_args, responds_with,
+                     rooms_args, rooms_fields, string)
 
 app= Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=['X-Next-After', 'ETag'])
 api =Api(app)
-rooms_args = reqparse.RequestParser()
-rooms_args.add_argument('roomNumber',type=int, required=True ) 
-rooms_args.add_argument('roomType',type=str, required=True ) 
-rooms_args.add_argument('price',type=int, required=True ) 
-rooms_args.add_argument('availability',type=bool, required=True ) 
-
-customers_args = reqparse.RequestParser()
-customers_args.add_argument('name',type=str, required=True )  
-customers_args.add_argument('contact',type=int, required=True ) 
-customers_args.add_argument('payment',type=str, required=True ) 
-
-reservations_args = reqparse.RequestParser()
-reservations_args.add_argument('customer',type=str, required=True )
-reservations_args.add_argument('roomNumber',type=int, required=True )
-reservations_args.add_argument('checkIn',type=str, required=True )
-reservations_args.add_argument('checkOut',type=str, required=True )
-
-
-rooms_fields={
-    'roomNumber':fields.Integer,
-    'roomType':fields.String,
-    'price':fields.Integer,
-    'availability':fields.Boolean,
-}
-customers_fields={
-    'id':fields.Integer,
-    'name':fields.String,
-    'contact':fields.Integer,
-    'payment':fields.String,
-}
+# ?profile=1 is honoured in debug mode, or when this is set.
+app.config.setdefault('ALLOW_PROFILING', False)
 
-reservation_fields = {
-    'roomNumber': fields.Integer,
-    'roomType': fields.String,
-    'customer_id': fields.Integer,
-    'checkIn': fields.String,
-    'checkOut': fields.String
-}
+log = logging.getLogger(__name__)
+
+PROFILE_LINES = 40
+
+# Instrumentation: each request's latency goes into models.metrics under its
+# route rule (served at /metrics), and ?profile=1 replaces the response with a
+# cProfile summary of the request. Registered first so its after_request hook
+# runs last and sees the final response.
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    if request.args.get('profile') == '1' and (app.debug or app.config['ALLOW_PROFILING']):
+        import cProfile  # only needed when profiling
+        g.profiler = cProfile.Profile()
+        g.profiler.enable()
+
+def profile_response(profiler):
+    import pstats
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_LINES)
+    return Response(out.getvalue(), mimetype='text/plain')
+
+@app.after_request
+def record_request(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        response.get_data()  # a streamed body runs here, under the profiler
+        profiler.disable()
+        return profile_response(profiler)
+    method, status, started = request.method, response.status_code, g.request_started
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    record = lambda: models.metrics.observe_request(method, endpoint, status, time.perf_counter() - started)
+    if response.is_streamed:
+        # Count the whole export, not just the time to the first row.
+        response.call_on_close(record)
+    else:
+        record()
+    return response
+
+@app.route('/metrics')
+def prometheus_metrics():
+    # One series per pool, labelled with its property ("" for the default database).
+    pool_stats = [({'property': property_id or ''}, stats) for property_id, stats in models.pool_stats().items()]
+    per_pool = lambda stat: [(labels, stats[stat]) for labels, stats in pool_stats]
+    cache_stats = models.cache.stats()
+    gauges = [
+        ('hotel_db_connections_opened_total', 'SQLite connections opened by the pool.', per_pool('opened')),
+        ('hotel_db_connections_open', 'SQLite connections currently open.', per_pool('open')),
+        ('hotel_db_connections_idle', 'Open connections waiting in the pool.', per_pool('idle')),
+        ('hotel_cache_hits_total', 'Query cache hits.', cache_stats['hits']),
+        ('hotel_cache_misses_total', 'Query cache misses.', cache_stats['misses']),
+        ('hotel_cache_evictions_total', 'Query cache entries evicted.', cache_stats['evictions']),
+        ('hotel_cache_invalidations_total', 'Query cache invalidations (committed writes).',
+         cache_stats['invalidations']),
+        ('hotel_cache_entries', 'Query cache entries.', cache_stats['entries']),
+    ]
+    return Response(models.metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+# Response formats: JSON, or MessagePack for `Accept: application/msgpack`, and
+# bodies of COMPRESS_MIN_SIZE bytes or more are sent brotli- or gzip-compressed
+# when Accept-Encoding allows. msgpack and brotli are optional dependencies
+# (pip install msgpack brotli), imported on first use; without them clients get
+# JSON and gzip.
+MSGPACK = 'application/msgpack'
+COMPRESS_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+@lru_cache(maxsize=None)
+def optional_module(name):
+    """The module, imported on first use, or None when it is not installed."""
+    try:
+        return importlib.import_module(name)
+    except ImportError:
+        return None
+
+if importlib.util.find_spec('msgpack') is not None:
+    @api.representation(MSGPACK)
+    def output_msgpack(data, code, headers=None):
+        response = app.make_response((optional_module('msgpack').packb(data), code))
+        response.headers.extend(headers or {})
+        return response
+
+ENCODINGS = (['br'] if importlib.util.find_spec('brotli') is not None else []) + ['gzip']
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return optional_module('brotli').compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+def response_variant():
+    """(media type, content encoding or None) negotiated from the request headers."""
+    mediatype = request.accept_mimetypes.best_match(list(api.representations), default='application/json')
+    return mediatype, request.accept_encodings.best_match(ENCODINGS)
+
+# Every resource is also served under /<property_id>/..., which routes the
+# request's Models calls to that property's database (see Models.use_property)
+# from before the connection below is acquired until the request is torn down.
+@app.url_value_preprocessor
+def pop_property(endpoint, values):
+    if values and 'property_id' in values:
+        g.property_id = values.pop('property_id')
+
+@app.before_request
+def select_property():
+    property_id = g.get('property_id')
+    if property_id is None:
+        return
+    scope = g.property_scope = ExitStack()
+    try:
+        scope.enter_context(models.use_property(property_id))
+    except ValueError as e:
+        abort(404, message=str(e))
+
+# One pooled connection per request: every Models call made while handling the
+# request reuses it, and it goes back to the pool once the request is torn down.
+# The change feed waits for minutes at a time, so it checks one out per query.
+@app.before_request
+def acquire_db_connection():
+    models.create_tables()  # checks the schema on the first request only
+    if request.endpoint != 'changes':
+        models.create_connection()
+
+@app.teardown_request
+def release_db_connection(exc):
+    models.release_connection()
+    scope = g.pop('property_scope', None)
+    if scope is not None:
+        scope.close()
+
+# Conditional GETs: every committed write, from this process or another, moves
+# the database's change sequence (models.data_version()) on, so with the date
+# (availability follows the calendar; see models.data_marker()) it identifies
+# the state of the data a GET response was built from. A client presenting the
+# current tag gets a 304 after that one lookup. Each format and encoding of a
+# response gets its own tag. Registered after the hooks above, so the tag is
+# read from the request's property database.
+def current_etag():
+    marker = models.data_marker()
+    if marker is None:
+        return None
+    version, day = marker
+    mediatype, encoding = response_variant()
+    tag = f"v{version}-{day}"
+    if mediatype != 'application/json':
+        tag += '-' + mediatype.rsplit('/', 1)[-1]
+    if encoding:
+        tag += '-' + encoding
+    return tag
+
+# Responses that say nothing about the data version (the change feed has its own cursor).
+UNVERSIONED_ENDPOINTS = {'prometheus_metrics', 'changes'}
+
+def etag_applies():
+    return request.method == 'GET' and request.endpoint not in UNVERSIONED_ENDPOINTS and not wants_ndjson()
+
+@app.before_request
+def check_not_modified():
+    if not etag_applies():
+        return None
+    # Taken before the handler runs, so the tag is never newer than the data.
+    g.etag = current_etag()
+    g.query_errors = models.metrics.query_errors
+    if g.etag is None:
+        return None
+    if request.if_none_match.contains(g.etag):
+        response = Response(status=304)
+        response.set_etag(g.etag)
+        return response
+    if 'profiler' not in g:
+        found, cached = encoded_bodies.get((request.full_path, g.etag))
+        if found:
+            g.cached_body = True
+            body, headers = cached
+            return Response(body, headers=headers)
+
+@app.after_request
+def add_etag(response):
+    etag = g.get('etag')
+    if etag and response.status_code == 200 and not response.is_streamed:
+        response.set_etag(etag)
+    return response
+
+# Encoded GET bodies, keyed by URL and ETag: until the next write, a repeated
+# GET is answered from here without running the handler, encoding or compressing.
+CACHED_BODY_MAX_SIZE = 4 * 1024 * 1024
+encoded_bodies = QueryCache(max_entries=64, ttl=models.cache.ttl)
+
+@app.after_request
+def encode_response(response):
+    if g.get('cached_body') or response.is_streamed or response.status_code != 200:
+        return response
+    response.vary.update(('Accept', 'Accept-Encoding'))
+    encoding = response_variant()[1]
+    if encoding and 'Content-Encoding' not in response.headers and \
+            response.content_length is not None and response.content_length >= COMPRESS_MIN_SIZE:
+        response.set_data(compress(response.get_data(), encoding))
+        response.headers['Content-Encoding'] = encoding
+    # Only if no write committed while the handler ran, since the tag predates the
+    # data, and no query failed (a failed reader returns an empty list).
+    etag = g.get('etag')
+    if etag and 'profiler' not in g and response.content_length <= CACHED_BODY_MAX_SIZE and \
+            models.metrics.query_errors == g.query_errors and etag == current_etag():
+        headers = [(name, value) for name, value in response.headers
+                   if name in ('Content-Type', 'Content-Encoding', 'Vary', 'X-Next-After')]
+        encoded_bodies.put((request.full_path, etag), (response.get_data(), headers))
+    return response
+
+# How long a write waits for room in a full write-behind queue before a 503.
+WRITE_QUEUE_TIMEOUT = 1.0
+
+def perform_write(fn, *args, **kwargs):
+    """Run a Models write, batched through writeBehind when its queue is running.
+
+    The request still waits for the commit; concurrent requests share it. A
+    write that fails (raises, or returns False) is answered with a 500.
+    """
+    result = _queued_write(fn, *args, **kwargs) if writeBehind.running() else fn(*args, **kwargs)
+    if result is False:
+        abort(500, message="The write failed")
+    return result
+
+def _queued_write(fn, *args, **kwargs):
+    # While the request waits, its connection goes back to the pool for the
+    # writer thread to use.
+    models.release_connection()
+    try:
+        return writeBehind.submit(fn, *args, timeout=WRITE_QUEUE_TIMEOUT, **kwargs).result()
+    except queue.Full:
+        abort(503, message="Too many pending writes, try again shortly")
+    except RuntimeError as e:
+        abort(503, message=str(e))
+    except sqlite3.Error as e:
+        log.warning("write %s failed: %s", fn.__name__, e)
+        abort(500, message="The write failed")
+    finally:
+        models.create_connection()
+
+def parse_args(schema):
+    """Validate the request against a RequestSchema; a 400 names the first bad argument."""
+    if schema.location == 'args':
+        source = request.args
+    else:
+        body = request.get_json(silent=True)
+        source = body if isinstance(body, dict) else request.values
+    try:
+        return schema.load(source)
+    except Invalid as e:
+        abort(400, message=e.errors)
+
+availability_args = RequestSchema('args',
+    **{'from': Arg(iso_date, required=True), 'to': Arg(iso_date, required=True)})
+
+MAX_PAGE_SIZE = 1000
+
+# Listing query string: ?after=&limit= keyset pagination, ?fields=a,b projection
+# and per-resource filters, all handed to Models to run in SQL.
+list_args = RequestSchema('args',
+    after=Arg(integer),
+    limit=Arg(int_range(1, MAX_PAGE_SIZE)),
+    fields=Arg(comma_list),
+)
+
+rooms_list_args = list_args.extend(
+    roomType=Arg(string),
+    minPrice=Arg(integer),
+    maxPrice=Arg(integer),
+    availability=Arg(boolean),
+)
+
+customers_list_args = list_args.extend(
+    name=Arg(string),
+    include=Arg(string, choices=('reservations',)),
+)
+
+# ?from=&to= lists the stays overlapping that range, archived ones included.
+reservations_list_args = list_args.extend(
+    customer_id=Arg(integer),
+    roomNumber=Arg(integer),
+    **{'from': Arg(iso_date), 'to': Arg(iso_date)})
+
+bills_args = RequestSchema('args',
+    customer_id=Arg(integer, many=True),
+    **{'from': Arg(iso_date), 'to': Arg(iso_date)})
+
+occupancy_args = availability_args
+
+properties_args = RequestSchema(property=Arg(string, required=True))
+
+MAX_CHANGES_WAIT = 60
+
+changes_args = RequestSchema('args',
+    since=Arg(natural),
+    entity=Arg(string, many=True, choices=tuple(models.CHANGE_SOURCES)),
+    limit=Arg(int_range(1, models.CHANGE_PAGE_SIZE), default=models.CHANGE_PAGE_SIZE),
+    wait=Arg(int_range(0, MAX_CHANGES_WAIT), default=0),
+)
+
+search_args = RequestSchema('args',
+    q=Arg(string, required=True),
+    limit=Arg(int_range(1, models.MAX_SEARCH_RESULTS), default=20),
+)
+
+
+occupancy_day_fields = Serializer({
+    'date': str,
+    'roomType': str,
+    'rooms': int,
+    'occupied': int,
+    'occupancy': float,
+    'arrivals': int,
+    'revenue': int,
+})
+
+occupancy_type_fields = Serializer({
+    'roomType': str,
+    'roomNights': int,
+    'occupancy': float,
+    'arrivals': int,
+    'revenue': int,
+    'averageStay': float,
+})
+
+occupancy_fields = Serializer({
+    'days': [occupancy_day_fields],
+    'roomTypes': [occupancy_type_fields],
+})
+
+chain_occupancy_fields = Serializer({
+    'roomNights': int,
+    'available': int,
+    'occupancy': float,
+    'arrivals': int,
+    'revenue': int,
+})
+
+chain_report_fields = Serializer({
+    'properties': [chain_occupancy_fields.extend(property=str)],
+    'chain': chain_occupancy_fields,
+})
+
+chain_rooms_fields = rooms_fields.extend(property=str)
+
+def projected_fields(serializer, key, requested, always=()):
+    if not requested:
+        return serializer
+    return serializer.only({key, *requested, *always})
+
+def list_response(fetch, serializer, key, args, always=(), **filters):
+    """Run a paginated Models listing and serialize only the requested fields."""
+    try:
+        data = fetch(after=args['after'], limit=args['limit'], fields=args['fields'], **filters)
+    except ValueError as e:
+        abort(400, message=str(e))
+    serializer = projected_fields(serializer, key, args['fields'], always)
+    headers = {}
+    if args['limit'] is not None and len(data) == args['limit']:
+        headers['X-Next-After'] = str(data[-1][key])
+    return serializer(data), 200, headers
+
+NDJSON = 'application/x-ndjson'
+
+def wants_ndjson():
+    return request.accept_mimetypes.best_match(['application/json', NDJSON]) == NDJSON
+
+def ndjson_response(rows, serializer, key, args):
+    """Stream rows as newline-delimited JSON, one serialized row per line."""
+    serialize = projected_fields(serializer, key, args['fields']).one
+
+    def generate():
+        for row in rows:
+            yield json.dumps(serialize(row)) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON)
 
 class Rooms(Resource):
-    @marshal_with(rooms_fields)
     def get(self):
-            data = models.get_rooms()
-            print("API Response:", data)  # Debugging
+            args = parse_args(rooms_list_args)
+            data = list_response(models.get_rooms, rooms_fields, 'roomNumber', args,
+                                 room_type=args['roomType'], min_price=args['minPrice'],
+                                 max_price=args['maxPrice'], availability=args['availability'])
+            log.debug("API Response: %s", data[0])
             return data
     
-    @marshal_with(rooms_fields)
+    @responds_with(rooms_fields)
     def post(self):
-        args= rooms_args.parse_args()
-        models.add_room_to_db(args['roomNumber'],args['roomType'],args['price'],args['availability'])
+        args= parse_args(rooms_args)
+        perform_write(models.add_room_to_db, args['roomNumber'],args['roomType'],args['price'],args['availability'])
         return 201
 
+class AvailableRooms(Resource):
+    @responds_with(rooms_fields)
+    def get(self):
+        args = parse_args(availability_args)
+        if args['to'] <= args['from']:
+            abort(400, message="'to' must be after 'from'")
+        return models.get_available_rooms(args['from'].isoformat(), args['to'].isoformat())
+
 class Room(Resource):
-    @marshal_with(rooms_fields)
+    @responds_with(rooms_fields)
     def delete(self,id):
-        models.delete_room_from_db(id)
+        perform_write(models.delete_room_from_db, id)
         return models.get_rooms()
     
-    @marshal_with(rooms_fields)
+    @responds_with(rooms_fields)
     def put(self,id):
-        models.checkout(id)
+        perform_write(models.checkout, id)
         return models.get_rooms()
 
 class Customers(Resource):
-    @marshal_with(customers_fields)  
     def get(self):
-        data = models.get_customers()
-        print("API Response:", data)  # Debugging
+        args = parse_args(customers_list_args)
+        if wants_ndjson():
+            try:
+                rows = models.iter_customers(name_prefix=args['name'], fields=args['fields'])
+            except ValueError as e:
+                abort(400, message=str(e))
+            return ndjson_response(rows, customers_fields, 'id', args)
+        if args['include'] == 'reservations':
+            data = list_response(models.get_customers_with_reservations, customer_reservations_fields, 'id',
+                                 args, always=('reservations',), name_prefix=args['name'])
+        else:
+            data = list_response(models.get_customers, customers_fields, 'id', args,
+                                 name_prefix=args['name'])
+        log.debug("API Response: %s", data[0])
         return data
     
-    @marshal_with(customers_fields)  
+    @responds_with(customers_fields)  
     def post(self):
-        args= customers_args.parse_args()
-        models.add_customer_to_db(args['name'],args['contact'],args['payment'])
+        args= parse_args(customers_args)
+        perform_write(models.add_customer_to_db, args['name'],args['contact'],args['payment'])
         return 201
 
+class CustomerSearch(Resource):
+    @responds_with(customer_search_fields)
+    def get(self):
+        args = parse_args(search_args)
+        return models.search_customers(args['q'], args['limit'])
+
 class Customer(Resource):
-    @marshal_with(customers_fields)
+    @responds_with(customers_fields)
     def delete(self,id):
-        models.delete_customer_from_db(id)
+        perform_write(models.delete_customer_from_db, id)
         return models.get_rooms()
     
+def bill_range(args):
+    """Validate the optional ?from=&to= billing period."""
+    if (args['from'] is None) != (args['to'] is None):
+        abort(400, message="'from' and 'to' must be given together")
+    if args['from'] is None:
+        return None, None
+    if args['to'] <= args['from']:
+        abort(400, message="'to' must be after 'from'")
+    return args['from'].isoformat(), args['to'].isoformat()
+
+def stay_range(args):
+    """The optional ?from= and ?to= of a reservation listing, as ISO strings."""
+    if args['from'] is not None and args['to'] is not None and args['to'] <= args['from']:
+        abort(400, message="'to' must be after 'from'")
+    return tuple(None if day is None else day.isoformat() for day in (args['from'], args['to']))
+
+class CustomerBill(Resource):
+    @responds_with(bill_fields)
+    def get(self,id):
+        check_in, check_out = bill_range(parse_args(bills_args))
+        return billing.bill_for_customer(id, check_in, check_out)
+
+class Bills(Resource):
+    @responds_with(bill_fields)
+    def get(self):
+        args = parse_args(bills_args)
+        check_in, check_out = bill_range(args)
+        return billing.get_bills(args['customer_id'], check_in, check_out)
+
+class OccupancyReport(Resource):
+    @responds_with(occupancy_fields)
+    def get(self):
+        args = parse_args(occupancy_args)
+        if args['to'] <= args['from']:
+            abort(400, message="'to' must be after 'from'")
+        return reports.get_occupancy(args['from'].isoformat(), args['to'].isoformat())
+
+class Properties(Resource):
+    def get(self):
+        return {'properties': models.list_properties()}
+
+    def post(self):
+        args = parse_args(properties_args)
+        try:
+            models.add_property(args['property'])
+        except ValueError as e:
+            abort(400, message=str(e))
+        return {'property': args['property']}, 201
+
+class ChainAvailableRooms(Resource):
+    @responds_with(chain_rooms_fields)
+    def get(self):
+        args = parse_args(availability_args)
+        if args['to'] <= args['from']:
+            abort(400, message="'to' must be after 'from'")
+        return models.get_chain_available_rooms(args['from'].isoformat(), args['to'].isoformat())
+
+class ChainOccupancyReport(Resource):
+    @responds_with(chain_report_fields)
+    def get(self):
+        args = parse_args(occupancy_args)
+        if args['to'] <= args['from']:
+            abort(400, message="'to' must be after 'from'")
+        return reports.get_chain_occupancy(args['from'].isoformat(), args['to'].isoformat())
+
+# Change feed: GET /changes?since=<seq> returns the rows changed since that
+# sequence number (see Models.get_changes); ?wait=N holds the request up to N
+# seconds until there is something to return. With Accept: text/event-stream
+# the response is a Server-Sent Events stream instead, one `change` event per
+# row, resuming from Last-Event-ID when the browser reconnects. Without
+# `since`, the feed starts from the latest change.
+SSE = 'text/event-stream'
+SSE_KEEPALIVE = 15
+SSE_RETRY_MS = 3000
+
+change_data_fields = {
+    'room': rooms_fields,
+    'customer': customers_fields,
+    'reservation': reservation_fields,
+}
+
+def marshal_changes(feed):
+    changes = []
+    for change in feed['changes']:
+        if change['data'] is not None:
+            change = dict(change, data=change_data_fields[change['entity']](change['data']))
+        changes.append(change)
+    return dict(feed, changes=changes)
+
+def sse_response(since, entities, limit):
+    def generate():
+        cursor = since
+        yield f'retry: {SSE_RETRY_MS}\n\n'
+        while True:
+            feed = marshal_changes(models.get_changes(cursor, limit, entities))
+            if feed['reset']:
+                yield f"id: {feed['last']}\nevent: reset\ndata: {{}}\n\n"
+            for change in feed['changes']:
+                yield f"id: {change['seq']}\nevent: change\ndata: {json.dumps(change)}\n\n"
+            cursor = feed['last']
+            if len(feed['changes']) == limit:
+                continue
+            if models.wait_for_changes(cursor, SSE_KEEPALIVE) == cursor:
+                # Comment line keeps proxies from closing an idle stream; the id
+                # moves the browser's resume point past changes it filtered out.
+                yield f": keepalive\nid: {cursor}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype=SSE, headers={'Cache-Control': 'no-cache'})
+
+class Changes(Resource):
+    def get(self):
+        args = parse_args(changes_args)
+        since = args['since']
+        if since is None and request.headers.get('Last-Event-ID', '').isdigit():
+            since = int(request.headers['Last-Event-ID'])
+        if since is None:
+            since = models.latest_change()[0]
+        if request.accept_mimetypes.best == SSE:
+            return sse_response(since, args['entity'], args['limit'])
+        feed = models.get_changes(since, args['limit'], args['entity'])
+        if not feed['changes'] and not feed['reset'] and args['wait']:
+            models.wait_for_changes(feed['last'], args['wait'])
+            feed = models.get_changes(since, args['limit'], args['entity'])
+        return marshal_changes(feed)
+
+class BulkImport(Resource):
+    """POST a JSON array of records, or CSV with a header row (Content-Type: text/csv)."""
+
+    def __init__(self, kind):
+        self.kind = kind
+
+    def post(self):
+        try:
+            if request.mimetype == 'text/csv':
+                records = bulkImport.read_csv(io.StringIO(request.get_data(as_text=True)))
+            else:
+                records = request.get_json(force=True)
+                if not isinstance(records, list):
+                    raise ValueError("expected a JSON array of records")
+            count = bulkImport.import_records(self.kind, records)
+        except models.BulkLoadError as e:
+            # The first `imported` records are stored; resend only the rest.
+            abort(400, message=str(e.error), imported=e.inserted)
+        except (ValueError, sqlite3.Error) as e:
+            abort(400, message=str(e))
+        return {'imported': count}, 201
+
+# Status for each refusal add_reservation_to_db can return.
+RESERVATION_ERRORS = {
+    models.CUSTOMER_NOT_FOUND: 404,
+    models.AMBIGUOUS_CUSTOMER: 400,
+    models.ROOM_NOT_FOUND: 404,
+    models.ROOM_NOT_AVAILABLE: 409,
+    models.RESERVATION_FAILED: 500,
+}
+
 class Reservations(Resource):
-    @marshal_with(reservation_fields)  
     def get(self):
-        data = models.get_reservations()
-        print("API Response:", data)  # Debugging
+        args = parse_args(reservations_list_args)
+        check_in, check_out = stay_range(args)
+        if wants_ndjson():
+            try:
+                rows = models.iter_reservations(customer_id=args['customer_id'], room_number=args['roomNumber'],
+                                                fields=args['fields'], check_in=check_in, check_out=check_out)
+            except ValueError as e:
+                abort(400, message=str(e))
+            return ndjson_response(rows, reservation_fields, 'id', args)
+        data = list_response(models.get_reservations, reservation_fields, 'id', args,
+                             customer_id=args['customer_id'], room_number=args['roomNumber'],
+                             check_in=check_in, check_out=check_out)
+        log.debug("API Response: %s", data[0])
         return data      
 
-    @marshal_with(reservation_fields)  
+    @responds_with(reservation_fields)  
     def post(self):
-        args= reservations_args.parse_args()
-        models.add_reservation_to_db(args['customer'],args['roomNumber'],args['checkIn'],args['checkOut'])
+        args= parse_args(reservations_args)
+        if args['customer'] is None and args['customer_id'] is None:
+            abort(400, message="'customer' or 'customer_id' is required")
+        if args['checkOut'] <= args['checkIn']:
+            abort(400, message="'checkOut' must be after 'checkIn'")
+        result = perform_write(models.add_reservation_to_db, args['customer'],args['roomNumber'],
+                               args['checkIn'].isoformat(), args['checkOut'].isoformat(),
+                               customer_id=args['customer_id'])
+        if result in RESERVATION_ERRORS:
+            abort(RESERVATION_ERRORS[result], message=result)
         return 201     
 
     
 class Reservation(Resource):
-    @marshal_with(reservation_fields)  
+    @responds_with(reservation_fields)  
     def get(self,id):
         data = models.get_reservations_for_customer(id)
-        print("API Response:", data)  # Debugging
+        log.debug("API Response: %s", data)
         return data
     
-    @marshal_with(reservation_fields)
+    @responds_with(rooms_fields)
     def delete(self,id):
-        models.delete_reservation_from_db(id)
+        # id is the reservation's id here (GET takes a customer id).
+        if perform_write(models.cancel_reservation, id) is None:
+            abort(404, message=f"Reservation {id} not found")
         return models.get_rooms()
 
 
@@ -119,21 +682,40 @@ class Reservation(Resource):
 
     
 
-api.add_resource(Rooms,'/')
-api.add_resource(Room,'/Room/<int:id>')
-api.add_resource(Customers,'/Customers')
-api.add_resource(Customer,'/Customers/<int:id>')
-api.add_resource(Reservations,'/Reservations')
-api.add_resource(Reservation,'/Reservations/<int:id>')
-
-
-   
-
+def add_routes(resource, url, **kwargs):
+    """Serve resource at url (default database) and at /<property_id>url (one property)."""
+    api.add_resource(resource, url, '/<property_id>' + url, **kwargs)
 
+add_routes(Rooms,'/')
+add_routes(AvailableRooms,'/Rooms/available')
+add_routes(Room,'/Room/<int:id>')
+add_routes(Customers,'/Customers')
+add_routes(CustomerSearch,'/Customers/search')
+add_routes(Customer,'/Customers/<int:id>')
+add_routes(CustomerBill,'/Customers/<int:id>/bill')
+add_routes(Bills,'/Bills')
+add_routes(OccupancyReport,'/Reports/occupancy')
+add_routes(BulkImport,'/Rooms/bulk', endpoint='rooms_bulk', resource_class_kwargs={'kind': 'rooms'})
+add_routes(BulkImport,'/Customers/bulk', endpoint='customers_bulk', resource_class_kwargs={'kind': 'customers'})
+add_routes(BulkImport,'/Reservations/bulk', endpoint='reservations_bulk', resource_class_kwargs={'kind': 'reservations'})
+add_routes(Reservations,'/Reservations')
+add_routes(Reservation,'/Reservations/<int:id>')
+add_routes(Changes,'/changes')
+api.add_resource(Properties,'/Properties')
+api.add_resource(ChainAvailableRooms,'/Properties/available')
+api.add_resource(ChainOccupancyReport,'/Properties/occupancy')
 
 
+def main():
+    logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'))
+    models.create_tables()
+    if os.environ.get('WRITE_BEHIND') == '1':
+        writeBehind.start()
+    if os.environ.get('ARCHIVE') == '1':
+        reservationArchive.start()
+    app.run(debug=True)
 
 
 if __name__ =="__main__":
-    app.run(debug=True)
+    main()
     
\ No newline at end of file
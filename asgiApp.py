@@ -0,0 +1,291 @@
+import json
+import re
+from urllib.parse import parse_qs
+
+import asyncModels as db
+from Models import (AMBIGUOUS_CUSTOMER, CUSTOMER_NOT_FOUND, MAX_SEARCH_RESULTS, RESERVATION_FAILED,
+                    ROOM_NOT_AVAILABLE, ROOM_NOT_FOUND)
+from schemas import (MISSING, Arg, Invalid, bill_fields, boolean, comma_list, customer_reservations_fields,
+                     customer_search_fields, customers_args, customers_fields, int_range, integer, iso_date,
+                     reservation_fields, reservations_args, rooms_args, rooms_fields, string)
+
+# ASGI version of the REST API in apiSupport.py, built on asyncModels so that
+# slow queries wait on executor threads instead of blocking the server.
+# Arguments and responses use the same schemas as apiSupport (schemas.py).
+# It has no framework dependency; run it with any ASGI server, e.g.
+#
+#     uvicorn asgiApp:app --port 8000
+
+MAX_PAGE_SIZE = 1000
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _iso_date(value):
+    return iso_date(value).isoformat()
+
+
+def _convert(source, name, convert, required):
+    # Errors take the shape apiSupport's RequestSchema gives them: {argument: message}.
+    value = source.get(name)
+    if value is None or value == '':
+        if required:
+            raise HTTPError(400, {name: MISSING})
+        return None
+    try:
+        return convert(value)
+    except ValueError as e:
+        raise HTTPError(400, {name: f"{name} {e}"}) from None
+
+
+_INVALID_BODY = object()
+
+
+class Request:
+    def __init__(self, scope, body, path_params):
+        self.scope = scope
+        self.method = scope['method']
+        self.path_params = path_params
+        self.query_lists = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        self.query = {key: values[-1] for key, values in self.query_lists.items()}
+        # Parsed once here; only handlers that read arguments from it report a bad body.
+        try:
+            self.body = json.loads(body) if body else {}
+        except ValueError:
+            self.body = _INVALID_BODY
+
+    def arg(self, name, convert=string, required=False):
+        return _convert(self.query, name, convert, required)
+
+    def arg_list(self, name, convert=string):
+        """Every value of a repeated query argument (?name=1&name=2), or None."""
+        values = [_convert({name: value}, name, convert, False) for value in self.query_lists.get(name, ())]
+        values = [value for value in values if value is not None]
+        return values or None
+
+    def body_args(self, schema):
+        """The JSON body's arguments, loaded with a schemas.RequestSchema."""
+        if self.body is _INVALID_BODY:
+            raise HTTPError(400, "Request body is not valid JSON")
+        if not isinstance(self.body, dict):
+            raise HTTPError(400, "Request body must be a JSON object")
+        try:
+            return schema.load(self.body)
+        except Invalid as e:
+            raise HTTPError(400, e.errors) from None
+
+    def page_args(self):
+        return {
+            'after': self.arg('after', integer),
+            'limit': self.arg('limit', int_range(1, MAX_PAGE_SIZE)),
+            'fields': self.arg('fields', comma_list) or None,
+        }
+
+
+async def _listing(fetch, serializer, key, request, always=(), **filters):
+    page = request.page_args()
+    try:
+        rows = await fetch(**page, **filters)
+    except ValueError as e:
+        raise HTTPError(400, str(e)) from None
+    if page['fields']:
+        serializer = serializer.only({key, *page['fields'], *always})
+    headers = []
+    if page['limit'] is not None and len(rows) == page['limit']:
+        headers.append((b'x-next-after', str(rows[-1][key]).encode()))
+    return 200, serializer(rows), headers
+
+
+async def _write(write, *args, **kwargs):
+    # Models writes return False when they fail (and print why).
+    result = await write(*args, **kwargs)
+    if result is False:
+        raise HTTPError(500, "The write failed")
+    return result
+
+
+async def _room_list():
+    return rooms_fields(await db.get_rooms())
+
+
+# Handlers: (request) -> (status, body[, extra headers])
+
+async def list_rooms(request):
+    return await _listing(db.get_rooms, rooms_fields, 'roomNumber', request,
+                          room_type=request.arg('roomType'), min_price=request.arg('minPrice', integer),
+                          max_price=request.arg('maxPrice', integer),
+                          availability=request.arg('availability', boolean))
+
+async def add_room(request):
+    args = request.body_args(rooms_args)
+    await _write(db.add_room_to_db, args['roomNumber'], args['roomType'], args['price'], args['availability'])
+    return 201, {'message': 'Room added.'}
+
+async def available_rooms(request):
+    check_in = request.arg('from', _iso_date, required=True)
+    check_out = request.arg('to', _iso_date, required=True)
+    if check_out <= check_in:
+        raise HTTPError(400, "'to' must be after 'from'")
+    rooms = await db.get_available_rooms(check_in, check_out)
+    return 200, rooms_fields(rooms)
+
+async def delete_room(request):
+    await _write(db.delete_room_from_db, request.path_params['id'])
+    return 200, await _room_list()
+
+async def checkout_room(request):
+    await _write(db.checkout, request.path_params['id'])
+    return 200, await _room_list()
+
+_include = Arg(string, choices=('reservations',)).load
+
+async def list_customers(request):
+    if request.arg('include', _include) == 'reservations':
+        return await _listing(db.get_customers_with_reservations, customer_reservations_fields, 'id', request,
+                              always=('reservations',), name_prefix=request.arg('name'))
+    return await _listing(db.get_customers, customers_fields, 'id', request,
+                          name_prefix=request.arg('name'))
+
+async def search_customers(request):
+    limit = request.arg('limit', int_range(1, MAX_SEARCH_RESULTS)) or 20
+    customers = await db.search_customers(request.arg('q', required=True), limit)
+    return 200, customer_search_fields(customers)
+
+async def add_customer(request):
+    args = request.body_args(customers_args)
+    await _write(db.add_customer_to_db, args['name'], args['contact'], args['payment'])
+    return 201, {'message': 'Customer added.'}
+
+async def delete_customer(request):
+    await _write(db.delete_customer_from_db, request.path_params['id'])
+    return 200, await _room_list()
+
+def _bill_range(request):
+    # The optional ?from=&to= billing period, as in apiSupport.bill_range.
+    check_in, check_out = request.arg('from', _iso_date), request.arg('to', _iso_date)
+    if (check_in is None) != (check_out is None):
+        raise HTTPError(400, "'from' and 'to' must be given together")
+    if check_in is not None and check_out <= check_in:
+        raise HTTPError(400, "'to' must be after 'from'")
+    return check_in, check_out
+
+async def customer_bill(request):
+    bill = await db.bill_for_customer(request.path_params['id'], *_bill_range(request))
+    return 200, bill_fields(bill)
+
+async def list_bills(request):
+    bills = await db.get_bills(request.arg_list('customer_id', integer), *_bill_range(request))
+    return 200, bill_fields(bills)
+
+async def list_reservations(request):
+    return await _listing(db.get_reservations, reservation_fields, 'id', request,
+                          customer_id=request.arg('customer_id', integer),
+                          room_number=request.arg('roomNumber', integer),
+                          check_in=request.arg('from', _iso_date), check_out=request.arg('to', _iso_date))
+
+# Status for each refusal add_reservation_to_db can return.
+RESERVATION_ERRORS = {
+    CUSTOMER_NOT_FOUND: 404,
+    AMBIGUOUS_CUSTOMER: 400,
+    ROOM_NOT_FOUND: 404,
+    ROOM_NOT_AVAILABLE: 409,
+    RESERVATION_FAILED: 500,
+}
+
+async def add_reservation(request):
+    args = request.body_args(reservations_args)
+    if args['customer'] is None and args['customer_id'] is None:
+        raise HTTPError(400, "'customer' or 'customer_id' is required")
+    if args['checkOut'] <= args['checkIn']:
+        raise HTTPError(400, "'checkOut' must be after 'checkIn'")
+    message = await db.add_reservation_to_db(args['customer'], args['roomNumber'], args['checkIn'].isoformat(),
+                                             args['checkOut'].isoformat(), customer_id=args['customer_id'])
+    if message in RESERVATION_ERRORS:
+        raise HTTPError(RESERVATION_ERRORS[message], message)
+    return 201, {'message': message}
+
+async def customer_reservations(request):
+    reservations = await db.get_reservations_for_customer(request.path_params['id'])
+    return 200, reservation_fields(reservations)
+
+async def delete_reservation(request):
+    # id is the reservation's id here (GET takes a customer id).
+    if await _write(db.cancel_reservation, request.path_params['id']) is None:
+        raise HTTPError(404, f"Reservation {request.path_params['id']} not found")
+    return 200, await _room_list()
+
+
+ROUTES = [
+    (re.compile(r'^/$'), {'GET': list_rooms, 'POST': add_room}),
+    (re.compile(r'^/Rooms/available$'), {'GET': available_rooms}),
+    (re.compile(r'^/Room/(?P<id>\d+)$'), {'DELETE': delete_room, 'PUT': checkout_room}),
+    (re.compile(r'^/Customers$'), {'GET': list_customers, 'POST': add_customer}),
+    (re.compile(r'^/Customers/search$'), {'GET': search_customers}),
+    (re.compile(r'^/Customers/(?P<id>\d+)$'), {'DELETE': delete_customer}),
+    (re.compile(r'^/Customers/(?P<id>\d+)/bill$'), {'GET': customer_bill}),
+    (re.compile(r'^/Bills$'), {'GET': list_bills}),
+    (re.compile(r'^/Reservations$'), {'GET': list_reservations, 'POST': add_reservation}),
+    (re.compile(r'^/Reservations/(?P<id>\d+)$'), {'GET': customer_reservations, 'DELETE': delete_reservation}),
+]
+
+
+def _resolve(method, path):
+    for pattern, methods in ROUTES:
+        match = pattern.match(path)
+        if match:
+            if method not in methods:
+                raise HTTPError(405, f"Method {method} not allowed")
+            return methods[method], {name: int(value) for name, value in match.groupdict().items()}
+    raise HTTPError(404, "Not found")
+
+
+async def _read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+
+async def _send_json(send, status, payload, extra_headers=()):
+    body = json.dumps(payload).encode()
+    headers = [(b'content-type', b'application/json'),
+               (b'content-length', str(len(body)).encode()),
+               (b'access-control-allow-origin', b'*'),
+               (b'access-control-expose-headers', b'X-Next-After'),
+               *extra_headers]
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await db.create_tables()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            db.shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+    try:
+        handler, path_params = _resolve(scope['method'], scope['path'])
+        request = Request(scope, await _read_body(receive), path_params)
+        status, payload, *headers = await handler(request)
+        await _send_json(send, status, payload, headers[0] if headers else ())
+    except HTTPError as e:
+        await _send_json(send, e.status, {'message': e.message})
@@ -0,0 +1,64 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+
+import Models as models
+import billing
+
+# asyncio front for the Models API.
+#
+# sqlite3 calls block, so they never run on the event loop. Writes go to one
+# dedicated writer thread (SQLite has a single writer anyway, and queueing
+# them here keeps lock contention out of the pool); reads go to a small reader
+# pool, which WAL mode lets run alongside the writer.
+
+READER_THREADS = 4
+
+_write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='hotel-db-writer')
+_read_executor = ThreadPoolExecutor(max_workers=READER_THREADS, thread_name_prefix='hotel-db-reader')
+
+
+async def _run(executor, fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+
+
+def _reader(fn):
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await _run(_read_executor, fn, *args, **kwargs)
+    return wrapper
+
+
+def _writer(fn):
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await _run(_write_executor, fn, *args, **kwargs)
+    return wrapper
+
+
+get_rooms = _reader(models.get_rooms)
+get_customers = _reader(models.get_customers)
+get_reservations = _reader(models.get_reservations)
+get_reservations_for_customer = _reader(models.get_reservations_for_customer)
+get_customers_with_reservations = _reader(models.get_customers_with_reservations)
+search_customers = _reader(models.search_customers)
+get_available_rooms = _reader(models.get_available_rooms)
+get_bills = _reader(billing.get_bills)
+bill_for_customer = _reader(billing.bill_for_customer)
+
+create_tables = _writer(models.create_tables)
+add_room_to_db = _writer(models.add_room_to_db)
+add_customer_to_db = _writer(models.add_customer_to_db)
+add_reservation_to_db = _writer(models.add_reservation_to_db)
+delete_room_from_db = _writer(models.delete_room_from_db)
+delete_customer_from_db = _writer(models.delete_customer_from_db)
+delete_reservation_from_db = _writer(models.delete_reservation_from_db)
+cancel_reservation = _writer(models.cancel_reservation)
+checkout = _writer(models.checkout)
+
+
+def shutdown():
+    """Wait for queued database work and stop the executor threads."""
+    _write_executor.shutdown(wait=True)
+    _read_executor.shutdown(wait=True)
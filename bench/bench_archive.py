@@ -0,0 +1,144 @@
+"""Hot-table query time as years of history grow, with and without the archive.
+
+For each history length loads a synthetic hotel whose stays run up to
+generate.END_DATE, times a few everyday queries with every stay in the hot
+table, then archives the stays that ended over a year before END_DATE and
+times them again. On the longest history it also books rooms from a second
+thread (one every BOOKING_INTERVAL seconds), first on its own and then while
+the archive run moves stays, and reports the booking latency of both.
+Exits non-zero if an archived query on the longest history is more than
+--tolerance times slower than on the shortest.
+
+    python bench/bench_archive.py --years 1 4 8 --rooms 200
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Models as models
+import billing
+import generate
+from generate import populate
+from support import measure, quiet
+
+STAYS_PER_ROOM_YEAR = 67  # generate.py's mean stay plus gap is about 5.5 nights
+END = generate.END_DATE
+BOOKING_INTERVAL = 0.005
+IDLE_BOOKING_TIME = 2.0
+
+
+def days_before_end(days):
+    return (END - timedelta(days=days)).isoformat()
+
+
+QUERIES = {
+    'customers + stays': lambda: models.get_customers_with_reservations(limit=100),
+    "loyal guest's stays": lambda: models.get_reservations_for_customer(1),
+    'free rooms, 1 week': lambda: models.get_available_rooms(days_before_end(30), days_before_end(23)),
+    'bills, 1 month': lambda: billing.get_bills(None, days_before_end(60), days_before_end(30)),
+}
+
+
+def time_queries(repeat):
+    return {name: measure(query, repeat, setup=models.cache.invalidate)['median_ms']
+            for name, query in QUERIES.items()}
+
+
+def hot_rows():
+    return models.execute_query('SELECT COUNT(*) FROM reservations', fetch=True)[0][0]
+
+
+def archive_while_booking(rooms):
+    """Archive while another thread books future stays.
+
+    Returns (stays moved, seconds, latencies of the bookings before, latencies during the run).
+    """
+    latencies = []
+    done = threading.Event()
+
+    def book():
+        day = date(2031, 1, 1)
+        room = 0
+        with quiet():
+            while not done.is_set():
+                room = room % rooms + 1
+                if room == 1:
+                    day += timedelta(days=1)
+                started = time.perf_counter()
+                models.add_reservation_to_db(None, room, day.isoformat(), (day + timedelta(days=1)).isoformat(),
+                                             customer_id=room)
+                latencies.append((time.perf_counter() - started) * 1000)
+                time.sleep(BOOKING_INTERVAL)
+
+    booker = threading.Thread(target=book)
+    booker.start()
+    time.sleep(IDLE_BOOKING_TIME)
+    idle = len(latencies)
+    started = time.perf_counter()
+    moved = models.archive_reservations(horizon_days())
+    elapsed = time.perf_counter() - started
+    done.set()
+    booker.join()
+    return moved, elapsed, latencies[:idle], latencies[idle:]
+
+
+def latency_summary(latencies):
+    latencies = sorted(latencies)
+    return (f"{len(latencies)} bookings, median {statistics.median(latencies):.2f} ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99)]:.2f} ms, max {latencies[-1]:.2f} ms")
+
+
+def horizon_days():
+    # Keep the last year of the synthetic history hot, whatever today's date.
+    return max((date.today() - (END - timedelta(days=365))).days, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--years', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--rooms', type=int, default=200)
+    parser.add_argument('--customers', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--tolerance', type=float, default=3.0,
+                        help='allowed slowdown of archived queries from the shortest to the longest history')
+    args = parser.parse_args()
+    # Full scans of the unarchived tables are the point here, not slow queries to log.
+    models.metrics.slow_query_threshold = float('inf')
+
+    print(f"{'years':>5}{'hot rows':>16}  {'query':<22}{'all hot ms':>11}{'archived ms':>13}")
+    archived = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for years in args.years:
+            models.configure_pool(os.path.join(tmp, f'{years}.db'), pool_size=4)
+            models.migrate()
+            populate(args.rooms, args.customers, args.rooms * years * STAYS_PER_ROOM_YEAR)
+            before_rows, before = hot_rows(), time_queries(args.repeat)
+            if years == args.years[-1]:
+                moved, elapsed, idle, busy = archive_while_booking(args.rooms)
+            else:
+                moved, busy = models.archive_reservations(horizon_days()), None
+            archived[years] = time_queries(args.repeat)
+            for name in QUERIES:
+                rows = f'{before_rows} -> {hot_rows()}' if name == next(iter(QUERIES)) else ''
+                print(f"{years:>5}{rows:>16}  {name:<22}{before[name]:>11.2f}{archived[years][name]:>13.2f}")
+            if busy:
+                print(f"archived {moved} stays in {elapsed:.2f}s ({moved / elapsed:.0f}/s)")
+                print(f"  before: {latency_summary(idle)}")
+                print(f"  during: {latency_summary(busy)}")
+            models.pool.close()
+
+    shortest, longest = archived[args.years[0]], archived[args.years[-1]]
+    slow = [name for name in QUERIES if longest[name] > shortest[name] * args.tolerance]
+    if slow:
+        sys.exit(f"archived queries grew with history: {', '.join(slow)}")
+
+
+if __name__ == '__main__':
+    main()
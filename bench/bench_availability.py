@@ -0,0 +1,54 @@
+"""Time Models.get_available_rooms on a large synthetic hotel.
+
+    python bench/bench_availability.py --rooms 10000 --reservations 3000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Models as models
+import generate
+from generate import populate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=10000)
+    parser.add_argument('--customers', type=int, default=200000)
+    parser.add_argument('--reservations', type=int, default=3000000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    n = {'rooms': args.rooms, 'customers': args.customers, 'reservations': args.reservations}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        models.configure_pool(os.path.join(tmp, 'bench.db'))
+        models.migrate()
+        started = time.perf_counter()
+        populate(n['rooms'], n['customers'], n['reservations'])
+        print(f"loaded {n} in {time.perf_counter() - started:.1f}s")
+
+        rnd = random.Random(3)
+        # Query dates inside the synthetic history and dates after it ends.
+        for label, first_day in (('inside history', date(2024, 6, 1)),
+                                 ('after history', generate.END_DATE + timedelta(days=30))):
+            timings = []
+            for _ in range(args.repeat):
+                check_in = first_day + timedelta(days=rnd.randint(0, 120))
+                check_out = check_in + timedelta(days=rnd.randint(1, 7))
+                started = time.perf_counter()
+                rooms = models.get_available_rooms(check_in.isoformat(), check_out.isoformat())
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            print(f"{label:<16} median {timings[len(timings) // 2] * 1000:8.2f} ms"
+                  f"   max {timings[-1] * 1000:8.2f} ms   ({len(rooms)} rooms free)")
+        models.pool.close()
+
+
+if __name__ == '__main__':
+    main()
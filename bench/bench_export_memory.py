@@ -0,0 +1,70 @@
+"""Check that an NDJSON export of /Reservations streams in bounded memory.
+
+Loads a synthetic database, streams GET /Reservations with
+Accept: application/x-ndjson through the Flask test client and records the
+peak traced allocation while the body is consumed. Exits non-zero if the peak
+exceeds --max-peak-mb.
+
+    python bench/bench_export_memory.py --reservations 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Models as models
+import apiSupport
+from generate import populate
+
+
+def stream_export(client, path):
+    """Consume a streamed export chunk by chunk; return (rows, bytes)."""
+    response = client.get(path, headers={'Accept': apiSupport.NDJSON}, buffered=False)
+    rows = size = 0
+    try:
+        for chunk in response.response:
+            rows += chunk.count(b'\n') if isinstance(chunk, bytes) else chunk.count('\n')
+            size += len(chunk)
+    finally:
+        response.close()
+    return rows, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=2000)
+    parser.add_argument('--customers', type=int, default=100000)
+    parser.add_argument('--reservations', type=int, default=1000000)
+    parser.add_argument('--max-peak-mb', type=float, default=16.0)
+    args = parser.parse_args()
+    n = {'rooms': args.rooms, 'customers': args.customers, 'reservations': args.reservations}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        models.configure_pool(os.path.join(tmp, 'bench.db'))
+        models.migrate()
+        populate(n['rooms'], n['customers'], n['reservations'])
+        client = apiSupport.app.test_client()
+
+        tracemalloc.start()
+        started = time.perf_counter()
+        rows, size = stream_export(client, '/Reservations')
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        models.pool.close()
+
+    peak_mb = peak / (1024 * 1024)
+    print(f"streamed {rows} rows ({size / (1024 * 1024):.1f} MB) in {elapsed:.1f}s, "
+          f"peak traced memory {peak_mb:.2f} MB")
+    if rows != args.reservations:
+        sys.exit(f"expected {args.reservations} rows, got {rows}")
+    if peak_mb > args.max_peak_mb:
+        sys.exit(f"peak memory {peak_mb:.2f} MB exceeds {args.max_peak_mb} MB")
+
+
+if __name__ == '__main__':
+    main()
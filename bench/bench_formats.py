@@ -0,0 +1,81 @@
+"""Bytes on the wire and encode time of GET /Customers per response format.
+
+For each list size and each format (JSON or MessagePack, uncompressed, gzip or
+brotli) reports the body size, the time to serialize and compress the
+marshalled list, and the time of a whole GET, first with the encoded-body
+cache cold and then answered from it (bodies over CACHED_BODY_MAX_SIZE are
+not cached). MessagePack and brotli rows are skipped when those packages are
+not installed.
+
+    python bench/bench_formats.py --sizes 10000 100000 --repeat 5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Models as models
+import apiSupport
+from generate import populate
+from support import measure
+
+MEDIATYPES = ('application/json', apiSupport.MSGPACK)
+
+
+def serializer(mediatype):
+    if mediatype == apiSupport.MSGPACK:
+        return apiSupport.optional_module('msgpack').packb
+    # As flask_restful's output_json outside debug mode.
+    return lambda data: (json.dumps(data) + '\n').encode()
+
+
+def formats():
+    for mediatype in MEDIATYPES:
+        if mediatype not in apiSupport.api.representations:
+            continue
+        for encoding in [None] + apiSupport.ENCODINGS:
+            yield mediatype, encoding
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    client = apiSupport.app.test_client()
+    # Reading the whole table is the point here, not a slow query to log.
+    models.metrics.slow_query_threshold = float('inf')
+
+    print(f"{'rows':>7}  {'format':<28}{'bytes':>12}{'encode ms':>11}{'GET ms':>9}{'cached ms':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            models.configure_pool(os.path.join(tmp, f'{size}.db'))
+            models.migrate()
+            populate(1, size, 0)
+            data = apiSupport.customers_fields(models.get_customers())
+            for mediatype, encoding in formats():
+                encode = serializer(mediatype)
+                if encoding:
+                    encoded = lambda: apiSupport.compress(encode(data), encoding)
+                else:
+                    encoded = lambda: encode(data)
+                body = encoded()
+                encode_time = measure(encoded, args.repeat)['median_ms']
+                headers = {'Accept': mediatype, 'Accept-Encoding': encoding or 'identity'}
+                get = lambda: client.get('/Customers', headers=headers)
+                assert get().data == body or encoding, "unexpected body"
+                cold = measure(get, args.repeat, setup=lambda: (models.cache.invalidate(),
+                                                                 apiSupport.encoded_bodies.invalidate()))
+                get()
+                warm = measure(get, args.repeat)
+                label = mediatype.rsplit('/', 1)[-1] + (f' + {encoding}' if encoding else '')
+                print(f"{size:>7}  {label:<28}{len(body):>12}{encode_time:>11.1f}"
+                      f"{cold['median_ms']:>9.1f}{warm['median_ms']:>11.2f}")
+            models.pool.close()
+
+
+if __name__ == '__main__':
+    main()
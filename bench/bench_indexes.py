@@ -0,0 +1,95 @@
+"""Time the hot Models lookups before and after the index migration.
+
+Builds a throwaway database at the current schema and loads it with
+synthetic rooms, customers and reservations (the bulk loaders need the later
+migrations' tables). Then it drops the indexes the index migration creates,
+times the queries, runs that migration again and times them once more.
+
+    python bench/bench_indexes.py --reservations 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Models as models
+from generate import populate
+
+# Created by the index migration (Models._create_indexes, schema version 3).
+MIGRATION_INDEXES = ('idx_reservations_customer', 'idx_reservations_room_dates',
+                     'idx_reservations_dates', 'idx_customers_name')
+
+QUERIES = {
+    # get_reservations_for_customer
+    'reservations for customer': (
+        '''SELECT r.roomNumber, r.roomType, res.checkIn, res.checkOut
+           FROM reservations res JOIN rooms r ON res.roomNumber = r.roomNumber
+           WHERE res.customer_id = ?''',
+        lambda rnd, n: (rnd.randint(1, n['customers']),)),
+    # delete_room_from_db / delete_reservation_from_db lookup
+    'reservations for room': (
+        'SELECT id FROM reservations WHERE roomNumber = ?',
+        lambda rnd, n: (rnd.randint(1, n['rooms']),)),
+    # add_reservation_to_db customer resolution
+    'customer by name': (
+        'SELECT id FROM customers WHERE name = ?',
+        lambda rnd, n: (f"guest-{rnd.randint(1, n['customers'])}",)),
+    # overlap check for one room and a date range
+    'room availability': (
+        '''SELECT 1 FROM reservations
+           WHERE roomNumber = ? AND checkIn < ? AND checkOut > ? LIMIT 1''',
+        lambda rnd, n: (rnd.randint(1, n['rooms']), '2024-06-10', '2024-06-03')),
+}
+
+
+def time_queries(n, repeat, seed=2):
+    rnd = random.Random(seed)
+    timings = {}
+    for label, (query, make_params) in QUERIES.items():
+        params = [make_params(rnd, n) for _ in range(repeat)]
+        started = time.perf_counter()
+        for p in params:
+            models.execute_query(query, p, fetch=True)
+        timings[label] = (time.perf_counter() - started) / repeat
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=2000)
+    parser.add_argument('--customers', type=int, default=200000)
+    parser.add_argument('--reservations', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    n = {'rooms': args.rooms, 'customers': args.customers, 'reservations': args.reservations}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        models.configure_pool(os.path.join(tmp, 'bench.db'))
+        models.migrate()
+        started = time.perf_counter()
+        populate(n['rooms'], n['customers'], n['reservations'])
+        print(f"loaded {n} in {time.perf_counter() - started:.1f}s")
+        with models.transaction() as tx:
+            for index in MIGRATION_INDEXES:
+                tx.execute(f'DROP INDEX {index}')
+
+        before = time_queries(n, args.repeat)
+        started = time.perf_counter()
+        with models.transaction(immediate=True) as tx:
+            models._create_indexes(tx)
+        print(f"index migration took {time.perf_counter() - started:.1f}s")
+        after = time_queries(n, args.repeat)
+        models.pool.close()
+
+    print(f"\n{'query':<28}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    for label in QUERIES:
+        b, a = before[label] * 1000, after[label] * 1000
+        print(f"{label:<28}{b:>14.3f}{a:>14.3f}{b / a:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
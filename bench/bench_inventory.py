@@ -0,0 +1,80 @@
+"""Memory and query time of RoomInventory against the get_rooms() list of dicts.
+
+    python bench/bench_inventory.py --rooms 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import roomInventory
+from roomInventory import RoomInventory
+
+ROOM_TYPES = ('single', 'double', 'twin', 'suite', 'family')
+
+
+def room_rows(count, seed=1):
+    rnd = random.Random(seed)
+    return [(i, rnd.choice(ROOM_TYPES), rnd.randint(50, 400), rnd.random() < 0.4)
+            for i in range(1, count + 1)]
+
+
+def traced(build):
+    tracemalloc.start()
+    value = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, size
+
+
+def best_of(fn, repeat=20):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=100000)
+    args = parser.parse_args()
+    rows = room_rows(args.rooms)
+
+    # ''.join copies the type string, as sqlite3 returns a new str for every row.
+    dicts, dicts_size = traced(lambda: [
+        {"roomNumber": r[0], "roomType": ''.join(r[1]), "price": r[2], "availability": r[3]} for r in rows])
+    inventory, inventory_size = traced(lambda: RoomInventory.from_rows(rows))
+
+    print(f"rooms: {args.rooms}   NumPy: {'yes' if roomInventory.numpy() is not None else 'no'}")
+    print(f"list of dicts  {dicts_size / 1e6:8.2f} MB")
+    print(f"RoomInventory  {inventory_size / 1e6:8.2f} MB   ({dicts_size / inventory_size:.1f}x smaller)")
+
+    queries = {
+        'free rooms': (
+            lambda: [d["roomNumber"] for d in dicts if d["availability"]],
+            lambda: inventory.filter(available=True)),
+        'double, 100-200': (
+            lambda: [d["roomNumber"] for d in dicts
+                     if d["roomType"] == 'double' and 100 <= d["price"] <= 200],
+            lambda: inventory.filter('double', 100, 200)),
+        'occupancy rate': (
+            lambda: 1 - sum(1 for d in dicts if d["availability"]) / len(dicts),
+            lambda: inventory.occupancy_rate()),
+        'RevPAR': (
+            lambda: sum(d["price"] for d in dicts if not d["availability"]) / len(dicts),
+            lambda: inventory.revenue_per_available_room()),
+    }
+    print(f"\n{'query':<18}{'dicts (us)':>14}{'inventory (us)':>16}")
+    for label, (on_dicts, on_inventory) in queries.items():
+        assert on_dicts() == on_inventory(), label
+        print(f"{label:<18}{best_of(on_dicts) * 1e6:>14.0f}{best_of(on_inventory) * 1e6:>16.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""Write throughput with the chain in one database against one database per property.
+
+Worker threads book one-night stays, each for one of the chain's properties.
+With --properties 1 every booking queues on the same SQLite write lock; with
+more, each property's bookings only contend with that property's.
+
+    python bench/bench_properties.py --properties 1 4 8 --workers 16 --synchronous FULL
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Models as models
+from generate import populate
+from support import quiet
+
+FIRST_DAY = date(2030, 1, 1)
+
+
+def bookings(worker, count, rooms, seed):
+    rnd = random.Random(seed * 1000 + worker)
+    for _ in range(count):
+        day = FIRST_DAY + timedelta(days=rnd.randrange(3650))
+        yield (None, rnd.randint(1, rooms), day.isoformat(), (day + timedelta(days=1)).isoformat(),
+               rnd.randint(1, 1000))
+
+
+def run(property_count, args, tmp):
+    models.configure_pool(os.path.join(tmp, f'{property_count}.db'),
+                          property_directory=os.path.join(tmp, f'{property_count}-properties'),
+                          synchronous=args.synchronous, pool_size=args.workers + 1)
+    property_ids = [f'hotel-{i}' for i in range(property_count)]
+    for property_id in property_ids:
+        with models.use_property(property_id, create=True):
+            populate(args.rooms, 1000, 0)
+    per_worker = args.bookings // args.workers
+
+    def worker(number):
+        outcomes = Counter()
+        with models.use_property(property_ids[number % property_count]):
+            for name, room, check_in, check_out, customer_id in bookings(number, per_worker, args.rooms, 1):
+                outcomes[models.add_reservation_to_db(name, room, check_in, check_out,
+                                                      customer_id=customer_id)] += 1
+        return outcomes
+
+    started = time.perf_counter()
+    with quiet(), ThreadPoolExecutor(args.workers) as executor:
+        outcomes = sum(executor.map(worker, range(args.workers)), Counter())
+    elapsed = time.perf_counter() - started
+    stored = sum(models.for_each_property(
+        models.execute_query, 'SELECT COUNT(*) FROM reservations', fetch=True).values(), [])
+    models.pool.close()
+    return per_worker * args.workers, elapsed, sum(row[0] for row in stored), outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--properties', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--bookings', type=int, default=4000, help='bookings per run, split across the workers')
+    parser.add_argument('--rooms', type=int, default=200, help='rooms per property')
+    parser.add_argument('--synchronous', default='FULL', choices=('OFF', 'NORMAL', 'FULL'))
+    args = parser.parse_args()
+    # Bookings waiting on the write lock would flood the slow-query log.
+    models.metrics.slow_query_threshold = float('inf')
+
+    print(f"{args.workers} workers, synchronous={args.synchronous}")
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for property_count in args.properties:
+            total, elapsed, stored, outcomes = run(property_count, args, tmp)
+            rate = total / elapsed
+            baseline = baseline or rate
+            print(f"{property_count:>3} properties {rate:>10.0f} bookings/s  ({elapsed:.2f}s, "
+                  f"{stored} stored, {baseline and rate / baseline:.2f}x)")
+            if outcomes["Reservation failed."]:
+                sys.exit(f"{outcomes['Reservation failed.']} bookings failed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""Per-row serialization and per-request validation: flask_restful against schemas.py.
+
+Serializes the rows GET /Reservations returns with flask_restful's marshal
+and the old field definitions, then with the compiled Serializer the API uses
+now, and checks both give the same output. Also validates a reservation POST
+body with reqparse and with RequestSchema. Exits non-zero if serialization is
+less than --target times faster.
+
+    python bench/bench_schemas.py --rows 10000 --target 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Models as models
+import apiSupport
+from flask_restful import fields, marshal, reqparse
+from generate import populate
+from support import measure
+
+# GET /Reservations before schemas.py.
+MARSHAL_FIELDS = {
+    'id': fields.Integer,
+    'roomNumber': fields.Integer,
+    'roomType': fields.String,
+    'customer_id': fields.Integer,
+    'checkIn': fields.String,
+    'checkOut': fields.String,
+}
+
+RESERVATION_BODY = {'customer': 'guest-1', 'roomNumber': 7, 'checkIn': '2030-01-01', 'checkOut': '2030-01-04'}
+
+
+def old_reservation_parser():
+    parser = reqparse.RequestParser()
+    parser.add_argument('customer', type=str)
+    parser.add_argument('customer_id', type=int)
+    parser.add_argument('roomNumber', type=int, required=True)
+    parser.add_argument('checkIn', type=str, required=True)
+    parser.add_argument('checkOut', type=str, required=True)
+    return parser
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--target', type=float, default=5.0, help='required serialization speedup')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        models.configure_pool(os.path.join(tmp, 'bench.db'))
+        models.migrate()
+        populate(200, 1000, args.rows)
+        rows = models.get_reservations()
+        models.pool.close()
+
+    serializer = apiSupport.reservation_fields
+    if [dict(row) for row in marshal(rows, MARSHAL_FIELDS)] != serializer(rows):
+        sys.exit("Serializer output differs from marshal")
+    old = measure(lambda: marshal(rows, MARSHAL_FIELDS), args.repeat)['median_ms']
+    new = measure(lambda: serializer(rows), args.repeat)['median_ms']
+
+    reqparse_parser = old_reservation_parser()
+    calls = 2000
+    with apiSupport.app.test_request_context('/Reservations', method='POST', json=RESERVATION_BODY):
+        old_parse = measure(lambda: [reqparse_parser.parse_args() for _ in range(calls)], 3)['median_ms']
+        new_parse = measure(lambda: [apiSupport.parse_args(apiSupport.reservations_args) for _ in range(calls)],
+                            3)['median_ms']
+
+    speedup = old / new
+    print(f"{len(rows)} reservation rows")
+    print(f"{'':<26}{'old (us)':>10}{'new (us)':>10}{'speedup':>9}")
+    print(f"{'serialize, per row':<26}{old * 1000 / len(rows):>10.2f}{new * 1000 / len(rows):>10.2f}{speedup:>8.1f}x")
+    print(f"{'validate POST, per call':<26}{old_parse * 1000 / calls:>10.2f}{new_parse * 1000 / calls:>10.2f}"
+          f"{old_parse / new_parse:>8.1f}x")
+    if speedup < args.target:
+        sys.exit(f"serialization speedup {speedup:.1f}x is below the {args.target}x target")
+
+
+if __name__ == '__main__':
+    main()
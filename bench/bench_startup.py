@@ -0,0 +1,102 @@
+"""Cold-start time of the entry-point modules, measured with python -X importtime.
+
+Each module is imported in a fresh interpreter, --repeat times, and the median
+cumulative import time is compared with its target. The API is also timed to
+its first answered request (import, schema check, GET /). Exits non-zero if
+any target is missed. Bytecode is compiled first, as it would be in a built
+container image.
+
+    python bench/bench_startup.py --repeat 7
+"""
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Milliseconds, median cumulative import time.
+TARGETS = {
+    'Models': 40,
+    'declarativeHotelManagment': 50,
+    'imparativeHotel': 50,
+    'apiSupport': 300,
+    'asgiApp': 120,
+}
+FIRST_REQUEST_TARGET_MS = 400
+
+FIRST_REQUEST = '''
+import sys, time
+started = time.perf_counter()
+import Models
+Models.configure_pool(sys.argv[1])
+import apiSupport
+response = apiSupport.app.test_client().get('/')
+assert response.status_code == 200, response.status_code
+print((time.perf_counter() - started) * 1000)
+'''
+
+
+def import_times(module):
+    """Run one fresh interpreter; return {module: (self_us, cumulative_us)}."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help='slowest imports to list per module')
+    args = parser.parse_args()
+    compileall.compile_dir(ROOT, quiet=1, maxlevels=0)
+
+    missed = []
+    print(f"{'module':<28}{'median (ms)':>12}{'target (ms)':>13}")
+    slowest = {}
+    for module, target in TARGETS.items():
+        runs = [import_times(module) for _ in range(args.repeat)]
+        median = statistics.median(run[module][1] for run in runs) / 1000
+        slowest[module] = sorted(runs[-1].items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+        flag = '' if median <= target else '  MISSED'
+        if flag:
+            missed.append(module)
+        print(f"{module:<28}{median:>12.1f}{target:>13}{flag}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, 'startup.db')
+        timings = []
+        for _ in range(args.repeat):
+            if os.path.exists(database):
+                os.remove(database)
+            started = time.perf_counter()
+            subprocess.run([sys.executable, '-c', FIRST_REQUEST, database], cwd=ROOT, check=True,
+                           capture_output=True)
+            timings.append((time.perf_counter() - started) * 1000)
+    first_request = statistics.median(timings)
+    flag = '' if first_request <= FIRST_REQUEST_TARGET_MS else '  MISSED'
+    if flag:
+        missed.append('first request')
+    print(f"{'API process to first 200':<28}{first_request:>12.1f}{FIRST_REQUEST_TARGET_MS:>13}{flag}")
+
+    for module, imports in slowest.items():
+        print(f"\nslowest imports under {module} (self ms):")
+        for name, (self_us, _) in imports:
+            print(f"  {self_us / 1000:7.1f}  {name}")
+
+    if missed:
+        sys.exit(f"startup targets missed: {', '.join(missed)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Writes per second with per-call commits against the write-behind queue.
+
+Worker threads each add customers and book rooms, waiting for every write to
+commit, first calling Models directly and then through writeBehind.
+
+    python bench/bench_write_behind.py --workers 16 --writes 2000 --synchronous FULL
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Models as models
+import writeBehind
+from generate import populate
+from support import quiet
+
+FIRST_DAY = date(2030, 1, 1)
+
+
+def writes(worker, count, rooms, seed):
+    """(fn, args) pairs: alternately a new customer and a one-night booking."""
+    rnd = random.Random(seed * 1000 + worker)
+    ops = []
+    for i in range(count):
+        if i % 2:
+            day = FIRST_DAY + timedelta(days=rnd.randrange(3650))
+            ops.append((models.add_reservation_to_db,
+                        (None, rnd.randint(1, rooms), day.isoformat(), (day + timedelta(days=1)).isoformat()),
+                        {'customer_id': rnd.randint(1, 1000)}))
+        else:
+            ops.append((models.add_customer_to_db, (f'walk-in {worker}-{i}', '5550000', 'cash'), {}))
+    return ops
+
+
+def run(workers, ops_per_worker, submit):
+    """Returns (seconds, writes that failed); a refused booking is not a failure."""
+    def worker(ops):
+        failed = 0
+        for fn, args, kwargs in ops:
+            try:
+                result = submit(fn, *args, **kwargs)
+            except sqlite3.Error:
+                result = False
+            failed += result is False or result == models.RESERVATION_FAILED
+        return failed
+
+    started = time.perf_counter()
+    with quiet(), ThreadPoolExecutor(workers) as executor:
+        failed = sum(executor.map(worker, ops_per_worker))
+    return time.perf_counter() - started, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--writes', type=int, default=2000, help='writes per mode, split across the workers')
+    parser.add_argument('--rooms', type=int, default=500)
+    parser.add_argument('--synchronous', default='NORMAL', choices=('OFF', 'NORMAL', 'FULL'))
+    parser.add_argument('--max-batch', type=int, default=writeBehind.MAX_BATCH)
+    parser.add_argument('--max-delay-ms', type=float, default=writeBehind.MAX_DELAY * 1000)
+    args = parser.parse_args()
+    per_worker = args.writes // args.workers
+    # Per-call commits wait on the write lock, which would flood the slow-query log.
+    models.metrics.slow_query_threshold = float('inf')
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ('per-call commit', 'write-behind'):
+            models.configure_pool(os.path.join(tmp, f'{mode}.db'), pool_size=args.workers + 1,
+                                  synchronous=args.synchronous)
+            models.migrate()
+            populate(args.rooms, 1000, 0)
+            ops = [writes(worker, per_worker, args.rooms, 1) for worker in range(args.workers)]
+            if mode == 'per-call commit':
+                elapsed, failed = run(args.workers, ops, lambda fn, *a, **kw: fn(*a, **kw))
+            else:
+                write_queue = writeBehind.start(max_batch=args.max_batch, max_delay=args.max_delay_ms / 1000)
+                elapsed, failed = run(args.workers, ops,
+                                      lambda fn, *a, **kw: writeBehind.submit(fn, *a, **kw).result())
+                batches = write_queue.batches
+                writeBehind.stop()
+            stored = models.execute_query('SELECT (SELECT COUNT(*) FROM customers) + '
+                                          '(SELECT COUNT(*) FROM reservations)', fetch=True)[0][0] - 1000
+            results[mode] = (elapsed, stored, failed)
+            models.pool.close()
+
+    total = per_worker * args.workers
+    print(f"{total} writes, {args.workers} workers, synchronous={args.synchronous}")
+    for mode, (elapsed, stored, failed) in results.items():
+        print(f"{mode:<18}{total / elapsed:>10.0f} writes/s   ({elapsed:.2f}s, {stored} rows stored, "
+              f"{failed} writes failed)")
+    print(f"write-behind used {batches} batches ({total / batches:.1f} writes per commit)")
+    base = results['per-call commit'][0] / results['write-behind'][0]
+    print(f"speedup {base:.2f}x")
+    if any(failed for _, _, failed in results.values()):
+        sys.exit("some writes failed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""Deterministic synthetic hotel data for benchmarks.
+
+Generates N rooms, M customers and K reservations from a seed and loads them
+through the Models bulk loaders. Stays follow a realistic shape: each room
+has a non-overlapping sequence of stays (mostly 1-4 nights, occasionally two
+weeks) separated by vacancy gaps that are shorter in summer and December, every
+room's history runs up to about END_DATE, and returning guests account for a
+large share of bookings.
+
+    python bench/generate.py bench.db --rooms 2000 --customers 100000 --reservations 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Models as models
+
+# Fixed so the same seed always gives the same database.
+END_DATE = date(2026, 12, 31)
+
+ROOM_TYPES = (
+    # (type, share of rooms, base price)
+    ('single', 0.30, 90),
+    ('double', 0.35, 140),
+    ('twin', 0.15, 130),
+    ('suite', 0.12, 320),
+    ('family', 0.08, 210),
+)
+STAY_NIGHTS = (1, 2, 3, 4, 5, 7, 10, 14)
+STAY_WEIGHTS = (30, 25, 18, 10, 7, 6, 3, 1)
+PAYMENTS = ('cash', 'credit card', 'debit card', 'bank transfer')
+BUSY_MONTHS = {6, 7, 8, 12}
+
+
+def room_rows(count, rnd):
+    types = [room_type for room_type, _, _ in ROOM_TYPES]
+    weights = [share for _, share, _ in ROOM_TYPES]
+    base_price = {room_type: price for room_type, _, price in ROOM_TYPES}
+    for room_number in range(1, count + 1):
+        room_type = rnd.choices(types, weights)[0]
+        price = int(base_price[room_type] * rnd.uniform(0.85, 1.25))
+        yield (room_number, room_type, price, True)
+
+
+def customer_rows(count, rnd):
+    for customer_id in range(1, count + 1):
+        yield (customer_id, f'guest-{customer_id}', str(5550000 + customer_id), rnd.choice(PAYMENTS))
+
+
+def _pick_customer(customers, rnd):
+    # A third of bookings come from the most loyal 5% of guests.
+    if rnd.random() < 0.33:
+        return rnd.randint(1, max(1, customers // 20))
+    return rnd.randint(1, customers)
+
+
+def reservation_rows(rooms, customers, reservations, rnd):
+    """Per-room, non-overlapping stays; yields (customer_id, roomNumber, checkIn, checkOut)."""
+    per_room, extra = divmod(reservations, rooms)
+    mean_nights = sum(n * w for n, w in zip(STAY_NIGHTS, STAY_WEIGHTS)) / sum(STAY_WEIGHTS)
+    for room_number in range(1, rooms + 1):
+        quota = per_room + (1 if room_number <= extra else 0)
+        if not quota:
+            continue
+        # Start far enough back that the room's stays end around END_DATE.
+        day = END_DATE - timedelta(days=int(quota * (mean_nights + 2.5)) + rnd.randint(0, 30))
+        for _ in range(quota):
+            gap_mean = 1.0 if day.month in BUSY_MONTHS else 3.0
+            day += timedelta(days=int(rnd.expovariate(1 / gap_mean)))
+            nights = rnd.choices(STAY_NIGHTS, STAY_WEIGHTS)[0]
+            check_out = day + timedelta(days=nights)
+            yield (_pick_customer(customers, rnd), room_number, day.isoformat(), check_out.isoformat())
+            day = check_out
+
+
+def populate(rooms, customers, reservations, seed=1):
+    """Load a synthetic hotel into the database Models is configured for."""
+    rnd = random.Random(seed)
+    models.bulk_add_rooms(room_rows(rooms, rnd))
+    models.bulk_add_customers(customer_rows(customers, rnd))
+    models.bulk_add_reservations(reservation_rows(rooms, customers, reservations, rnd))
+    return {'rooms': rooms, 'customers': customers, 'reservations': reservations, 'seed': seed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('database')
+    parser.add_argument('--rooms', type=int, default=2000)
+    parser.add_argument('--customers', type=int, default=100000)
+    parser.add_argument('--reservations', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    if os.path.exists(args.database):
+        sys.exit(f"{args.database} already exists")
+
+    models.configure_pool(args.database)
+    models.create_tables()
+    started = time.perf_counter()
+    populate(args.rooms, args.customers, args.reservations, args.seed)
+    models.pool.close()
+    print(f"Generated {args.database} in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Compare requests/second and latency percentiles of the Flask and ASGI apps.
+
+Start both servers against the same database first, e.g.
+
+    python apiSupport.py                      # Flask, port 5000
+    uvicorn asgiApp:app --port 8000           # ASGI
+
+then
+
+    python bench/load_test.py --target flask=http://127.0.0.1:5000 \\
+                              --target asgi=http://127.0.0.1:8000 --clients 200
+
+Every client is a thread with its own keep-alive connection polling the
+given paths, the way the front-end pages poll the API.
+"""
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def client_loop(base, paths, deadline, latencies, errors):
+    parts = urlsplit(base)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    i = 0
+    while time.perf_counter() < deadline:
+        path = paths[i % len(paths)]
+        i += 1
+        started = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 400:
+                errors.append(response.status)
+                continue
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(type(e).__name__)
+            conn.close()
+            conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return float('nan')
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def run(base, paths, clients, duration):
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    threads = [threading.Thread(target=client_loop, args=(base, paths, deadline, latencies, errors))
+               for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target', action='append', required=True, metavar='NAME=URL')
+    parser.add_argument('--path', action='append', dest='paths',
+                        help="path to poll (repeatable; default: / and /Reservations?limit=50)")
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=15.0)
+    args = parser.parse_args()
+    paths = args.paths or ['/', '/Reservations?limit=50']
+
+    print(f"{'target':<10}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for target in args.target:
+        name, _, base = target.partition('=')
+        result = run(base, paths, args.clients, args.duration)
+        print(f"{name:<10}{result['requests']:>10}{result['errors']:>8}{result['rps']:>10.0f}"
+              f"{result['p50_ms']:>10.1f}{result['p99_ms']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""Benchmark suite: Models functions, the two CLIs and the Flask endpoints.
+
+Generates a deterministic synthetic hotel in a temporary directory, times
+every case and writes the results as JSON so runs from different commits can
+be compared:
+
+    python bench/run.py --output before.json
+    git checkout my-branch
+    python bench/run.py --output after.json --compare before.json
+
+Read cases run with a cold query cache unless their name says "(cached)".
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Models as models
+import billing
+import declarativeHotelManagment
+import generate
+import imparativeHotel
+import reports
+from support import measure, quiet
+
+# Dates for new bookings, well clear of the generated history.
+FUTURE = generate.END_DATE + timedelta(days=365)
+
+
+def _cold():
+    models.cache.invalidate()
+
+
+def _drain(rows):
+    for _ in rows:
+        pass
+
+
+def model_cases(n, rnd):
+    """(name, fn, setup) for the Models and billing functions."""
+    room = lambda: rnd.randint(1, n['rooms'])
+    customer = lambda: rnd.randint(1, n['customers'])
+    new_rooms = itertools.count(n['rooms'] + 1)
+    stays = itertools.count()
+
+    def new_customers(count):
+        # add_customer_to_db takes ids too, so continue from the current maximum.
+        first = models.execute_query('SELECT MAX(id) FROM customers', fetch=True)[0][0] + 1
+        return range(first, first + count)
+
+    def spare_room():
+        # A room nobody else uses, with one stay, for the delete cases.
+        number = next(new_rooms)
+        models.bulk_add_rooms([(number, 'single', 100, True)])
+        models.bulk_add_reservations([(1, number, FUTURE.isoformat(), (FUTURE + timedelta(days=2)).isoformat())])
+        return number
+
+    def spare_customer():
+        customer_id, = new_customers(1)
+        models.bulk_add_customers([(customer_id, f'guest-{customer_id}', '5550000', 'cash')])
+        models.bulk_add_reservations([(customer_id, room(), (FUTURE - timedelta(days=30)).isoformat(),
+                                       (FUTURE - timedelta(days=29)).isoformat())])
+        return customer_id
+
+    def new_stay():
+        day = FUTURE + timedelta(days=10 + 3 * next(stays))
+        return day.isoformat(), (day + timedelta(days=2)).isoformat()
+
+    pending = []
+    prepare = lambda make: lambda: pending.append(make())
+
+    return [
+        ('get_rooms', lambda: models.get_rooms(), _cold),
+        ('get_rooms (cached)', lambda: models.get_rooms(), None),
+        ('get_rooms page', lambda: models.get_rooms(after=room(), limit=100), _cold),
+        ('get_rooms filtered', lambda: models.get_rooms(room_type='double', min_price=100, max_price=200), _cold),
+        ('get_customers page', lambda: models.get_customers(after=customer(), limit=100), _cold),
+        ('get_customers prefix', lambda: models.get_customers(name_prefix='guest-12', limit=100), _cold),
+        ('search_customers prefix', lambda: models.search_customers(f"guest-{customer()}"[:8]), _cold),
+        ('get_reservations page', lambda: models.get_reservations(limit=100), _cold),
+        ('get_reservations for room', lambda: models.get_reservations(room_number=room()), _cold),
+        ('get_reservations_for_customer', lambda: models.get_reservations_for_customer(customer()), _cold),
+        ('get_customers_with_reservations page',
+         lambda: models.get_customers_with_reservations(after=customer(), limit=100), _cold),
+        ('iter_customers', lambda: _drain(models.iter_customers()), None),
+        ('iter_reservations', lambda: _drain(models.iter_reservations()), None),
+        ('get_available_rooms', lambda: models.get_available_rooms(*new_stay()), _cold),
+        ('get_available_rooms (cached)',
+         lambda: models.get_available_rooms(FUTURE.isoformat(), (FUTURE + timedelta(days=1)).isoformat()), None),
+        ('is_room_available', lambda: models.is_room_available(room(), *new_stay()), None),
+        ('get_room_inventory', lambda: models.get_room_inventory(), models._reset_room_inventory),
+        ('get_bills', lambda: billing.get_bills(), _cold),
+        ('get_bills range', lambda: billing.get_bills(None, '2025-01-01', '2025-02-01'), _cold),
+        ('bill_for_customer', lambda: billing.bill_for_customer(customer()), _cold),
+        ('get_occupancy year', lambda: reports.get_occupancy('2025-01-01', '2026-01-01'), _cold),
+        ('add_room_to_db', lambda: models.add_room_to_db(next(new_rooms), 'single', 100, True), None),
+        ('add_customer_to_db', lambda: models.add_customer_to_db('bench guest', '5550000', 'cash'), None),
+        ('add_reservation_to_db', lambda: models.add_reservation_to_db('guest-1', room(), *new_stay()), None),
+        ('checkout', lambda: models.checkout(room()), None),
+        ('delete_reservation_from_db', lambda: models.delete_reservation_from_db(pending.pop()),
+         prepare(spare_room)),
+        ('delete_room_from_db', lambda: models.delete_room_from_db(pending.pop()), prepare(spare_room)),
+        ('delete_customer_from_db', lambda: models.delete_customer_from_db(pending.pop()),
+         prepare(spare_customer)),
+        ('bulk_add_customers 1000',
+         lambda: models.bulk_add_customers([(customer_id, 'bulk guest', '5550000', 'cash')
+                                            for customer_id in pending.pop()]),
+         lambda: pending.append(new_customers(1000))),
+    ]
+
+
+def cli_cases(n, rnd):
+    """The declarative and imperative versions of the same three operations."""
+    cases = []
+    for label, cli in (('declarative', declarativeHotelManagment), ('imperative', imparativeHotel)):
+        cases += [
+            (f'{label} available_rooms', lambda cli=cli: cli.available_rooms(), _cold),
+            (f'{label} show_bill', lambda cli=cli: cli.show_bill(rnd.randint(1, n['customers'])), _cold),
+            (f'{label} show_customers', lambda cli=cli: cli.show_customers(), _cold),
+        ]
+    return cases
+
+
+def api_cases(n, rnd):
+    """One case per Flask endpoint, through the test client."""
+    import apiSupport
+    client = apiSupport.app.test_client()
+
+    def get(path, **kwargs):
+        response = client.get(path, **kwargs)
+        response.get_data()
+        assert response.status_code == 200, (path, response.status_code)
+
+    def next_id():
+        return models.execute_query('SELECT MAX(id) FROM customers', fetch=True)[0][0] + 1
+
+    stay = FUTURE + timedelta(days=200)
+    pending = []
+    return [
+        ('GET /', lambda: get('/?limit=100'), _cold),
+        ('GET /Rooms/available',
+         lambda: get(f'/Rooms/available?from={stay}&to={stay + timedelta(days=2)}'), _cold),
+        ('GET /Customers', lambda: get(f"/Customers?limit=100&after={rnd.randint(1, n['customers'])}"), _cold),
+        ('GET /Customers?include=reservations',
+         lambda: get(f"/Customers?limit=100&include=reservations&after={rnd.randint(1, n['customers'])}"), _cold),
+        ('GET /Customers/search', lambda: get(f"/Customers/search?q=guest-{rnd.randint(1, n['customers'])}"), _cold),
+        ('GET /Customers/<id>/bill', lambda: get(f"/Customers/{rnd.randint(1, n['customers'])}/bill"), _cold),
+        ('GET /Bills', lambda: get('/Bills?from=2025-01-01&to=2025-02-01'), _cold),
+        ('GET /Reports/occupancy', lambda: get('/Reports/occupancy?from=2025-01-01&to=2025-02-01'), _cold),
+        ('GET /Reservations', lambda: get('/Reservations?limit=100'), _cold),
+        ('GET /Reservations ndjson', lambda: get('/Reservations', headers={'Accept': apiSupport.NDJSON}), None),
+        ('GET /Reservations/<id>', lambda: get(f"/Reservations/{rnd.randint(1, n['customers'])}"), _cold),
+        ('POST /Customers',
+         lambda: client.post('/Customers', json={'name': 'api guest', 'contact': 5550000, 'payment': 'cash'}),
+         None),
+        ('POST /Customers/bulk',
+         lambda: client.post('/Customers/bulk', json=pending.pop()),
+         lambda: pending.append([{'id': customer_id, 'name': 'bulk guest', 'contact': '5550000', 'payment': 'cash'}
+                                 for customer_id in range(next_id(), next_id() + 100)])),
+    ]
+
+
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\ncompared with {baseline_path} ({baseline.get('commit')})")
+    print(f"{'case':<42}{'before (ms)':>13}{'after (ms)':>13}{'ratio':>9}")
+    for name, result in results.items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        ratio = result['median_ms'] / old['median_ms'] if old['median_ms'] else float('inf')
+        print(f"{name:<42}{old['median_ms']:>13.3f}{result['median_ms']:>13.3f}{ratio:>8.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=1000)
+    parser.add_argument('--customers', type=int, default=20000)
+    parser.add_argument('--reservations', type=int, default=200000)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--skip-cli', action='store_true')
+    parser.add_argument('--skip-api', action='store_true')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='a JSON file from an earlier run to compare against')
+    args = parser.parse_args()
+    n = {'rooms': args.rooms, 'customers': args.customers, 'reservations': args.reservations}
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        models.configure_pool(os.path.join(tmp, 'bench.db'))
+        models.migrate()
+        started = time.perf_counter()
+        params = generate.populate(n['rooms'], n['customers'], n['reservations'], args.seed)
+        print(f"loaded {n} in {time.perf_counter() - started:.1f}s")
+
+        rnd = random.Random(args.seed)
+        cases = model_cases(n, rnd)
+        if not args.skip_cli:
+            cases += cli_cases(n, rnd)
+        if not args.skip_api:
+            cases += api_cases(n, rnd)
+
+        print(f"\n{'case':<42}{'min (ms)':>11}{'median (ms)':>13}{'max (ms)':>11}")
+        for name, fn, setup in cases:
+            with quiet():
+                result = measure(fn, args.repeat, setup)
+            results[name] = result
+            print(f"{name:<42}{result['min_ms']:>11.3f}{result['median_ms']:>13.3f}{result['max_ms']:>11.3f}")
+        models.pool.close()
+
+    report = {
+        'commit': current_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'params': dict(params, repeat=args.repeat),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Fire concurrent bookings at a few rooms and check none are double-booked.
+
+Each worker thread books random short stays in a small date window, so most
+requests clash with another. Every booking must come back as either added or
+"not available"; afterwards no two reservations for a room may overlap.
+
+    python bench/stress_booking.py --bookings 5000 --workers 16
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Models as models
+from generate import populate
+from support import quiet
+
+FIRST_DAY = date(2030, 1, 1)
+
+DOUBLE_BOOKINGS_QUERY = '''
+    SELECT COUNT(*) FROM reservations a JOIN reservations b
+      ON a.roomNumber = b.roomNumber AND a.id < b.id
+     AND a.checkOut > b.checkIn AND a.checkIn < b.checkOut
+'''
+
+
+def booking_requests(count, rooms, customers, days, seed):
+    rnd = random.Random(seed)
+    for _ in range(count):
+        check_in = FIRST_DAY + timedelta(days=rnd.randrange(days))
+        check_out = check_in + timedelta(days=rnd.randint(1, 4))
+        yield (f'guest-{rnd.randint(1, customers)}', rnd.randint(1, rooms),
+               check_in.isoformat(), check_out.isoformat())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--bookings', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--rooms', type=int, default=20)
+    parser.add_argument('--days', type=int, default=60, help='width of the date window being booked')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        models.configure_pool(os.path.join(tmp, 'stress.db'), pool_size=args.workers)
+        models.migrate()
+        populate(args.rooms, 1000, 0)
+        requests = list(booking_requests(args.bookings, args.rooms, 1000, args.days, args.seed))
+
+        started = time.perf_counter()
+        with quiet(), ThreadPoolExecutor(args.workers) as executor:
+            outcomes = Counter(executor.map(lambda r: models.add_reservation_to_db(*r), requests))
+        elapsed = time.perf_counter() - started
+
+        double_bookings = models.execute_query(DOUBLE_BOOKINGS_QUERY, fetch=True)[0][0]
+        stored = models.execute_query('SELECT COUNT(*) FROM reservations', fetch=True)[0][0]
+        models.pool.close()
+
+    print(f"{args.bookings} bookings, {args.workers} workers, {args.rooms} rooms over {args.days} days")
+    for outcome, count in outcomes.most_common():
+        print(f"  {count:>6}  {outcome}")
+    print(f"throughput {args.bookings / elapsed:.0f} bookings/s ({elapsed:.2f}s)")
+    print(f"stored {stored} reservations, {double_bookings} overlapping pairs")
+
+    if double_bookings:
+        sys.exit("double bookings found")
+    if stored != outcomes["Reservation added successfully!"]:
+        sys.exit("stored reservations do not match the successful bookings")
+    if outcomes["Reservation failed."]:
+        sys.exit(f"{outcomes['Reservation failed.']} bookings failed")
+
+
+if __name__ == '__main__':
+    main()
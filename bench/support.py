@@ -0,0 +1,29 @@
+"""Helpers shared by the benchmark scripts."""
+import contextlib
+import io
+import statistics
+import time
+
+
+@contextlib.contextmanager
+def quiet():
+    """Swallow the success messages the Models and CLI functions print."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def measure(fn, repeat, setup=None):
+    """Call fn `repeat` times (after setup(), untimed, each time); timings in ms."""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return {
+        'runs': repeat,
+        'min_ms': min(timings),
+        'median_ms': statistics.median(timings),
+        'max_ms': max(timings),
+    }
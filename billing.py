@@ -0,0 +1,74 @@
+import Models as models
+
+# Billing engine: nights x room price summed in SQL, one GROUP BY per call
+# instead of one Python loop (and room lookup) per reservation.
+#
+# Without a date range a bill covers every stay on record. With check_in /
+# check_out only the nights that fall inside [check_in, check_out) are billed,
+# which is what nightly or monthly invoicing needs. Stays moved to the archive
+# (see "Archive" in Models) are billed as well.
+
+BILL_FIELDS = ('customer_id', 'stays', 'nights', 'total')
+
+# SQLite limits the number of bound parameters per statement.
+MAX_IDS_PER_QUERY = 500
+
+
+def _bill_query(has_range, id_count, stays):
+    if not has_range:
+        first_night, last_night = 'res.checkIn', 'res.checkOut'
+    else:
+        first_night, last_night = 'MAX(res.checkIn, ?)', 'MIN(res.checkOut, ?)'
+    nights = f'CAST(julianday({last_night}) - julianday({first_night}) AS INTEGER)'
+    conditions = []
+    if has_range:
+        conditions.append('res.checkOut > ? AND res.checkIn < ?')
+    if id_count:
+        conditions.append(f"res.customer_id IN ({', '.join('?' * id_count)})")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    # Grouping on +customer_id keeps the planner from walking the whole
+    # customer_id index just to avoid a sort; the date or id filter picks the index.
+    return f'''
+        SELECT customer_id, COUNT(*), SUM(nights), SUM(nights * price)
+        FROM (
+            SELECT +res.customer_id AS customer_id, {nights} AS nights, r.price AS price
+            FROM {stays} res
+            JOIN rooms r ON r.roomNumber = res.roomNumber
+            {where}
+        )
+        GROUP BY customer_id
+        ORDER BY customer_id
+    '''
+
+
+def _run_bill_query(range_start, range_end, customer_ids):
+    has_range = range_start is not None
+    query = _bill_query(has_range, len(customer_ids or ()), models.stays_table(range_start))
+    params = []
+    if has_range:
+        # Clipped nights (MIN(checkOut, end) - MAX(checkIn, start)), then the overlap test.
+        params += [range_end, range_start, range_start, range_end]
+    params += list(customer_ids or ())
+    result = models.execute_query(query, tuple(params), fetch=True) or []
+    return [dict(zip(BILL_FIELDS, row)) for row in result]
+
+
+@models.cache.cached
+def get_bills(customer_ids=None, check_in=None, check_out=None):
+    """Bills per customer, for the given customers (or everyone), optionally limited to a date range."""
+    if (check_in is None) != (check_out is None):
+        raise ValueError("check_in and check_out must be given together")
+    if customer_ids is None:
+        return _run_bill_query(check_in, check_out, None)
+    customer_ids = list(customer_ids)
+    bills = []
+    for start in range(0, len(customer_ids), MAX_IDS_PER_QUERY):
+        bills += _run_bill_query(check_in, check_out, customer_ids[start:start + MAX_IDS_PER_QUERY])
+    return bills
+
+
+def bill_for_customer(customer_id, check_in=None, check_out=None):
+    bills = get_bills([customer_id], check_in, check_out)
+    if bills:
+        return bills[0]
+    return {'customer_id': customer_id, 'stays': 0, 'nights': 0, 'total': 0}
@@ -0,0 +1,121 @@
+import argparse
+import csv
+import json
+import sqlite3
+import sys
+
+import Models as models
+from schemas import boolean, integer, iso_date, string
+
+# Bulk import of rooms, customers and reservations from JSON or CSV records.
+#
+# Records are dicts keyed by the API field names (a JSON array of objects, or
+# CSV with a header row). They are converted with the API's converters (see
+# schemas.py) and checked one at a time and fed lazily to the Models
+# bulk_add_* functions, so a large file is never held in memory as a whole.
+#
+#     python bulkImport.py rooms rooms.csv
+#     python bulkImport.py reservations stays.json --database hotel.db
+
+
+def _iso_date(value):
+    return iso_date(str(value).strip()).isoformat()
+
+# kind -> (Models loader, row columns in loader order as (field, converter, required))
+KINDS = {
+    'rooms': (models.bulk_add_rooms, (
+        ('roomNumber', integer, True),
+        ('roomType', string, True),
+        ('price', integer, True),
+        ('availability', boolean, True),
+    )),
+    'customers': (models.bulk_add_customers, (
+        ('id', integer, False),
+        ('name', string, True),
+        ('contact', string, True),
+        ('payment', string, True),
+    )),
+    'reservations': (models.bulk_add_reservations, (
+        ('customer_id', integer, True),
+        ('roomNumber', integer, True),
+        ('checkIn', _iso_date, True),
+        ('checkOut', _iso_date, True),
+    )),
+}
+
+
+def parse_records(kind, records):
+    """Yield loader row tuples for records; ValueError names the offending record."""
+    columns = KINDS[kind][1]
+    for number, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            raise ValueError(f"record {number}: expected an object")
+        row = []
+        for field, convert, required in columns:
+            value = record.get(field)
+            if value is None or value == '':
+                if required:
+                    raise ValueError(f"record {number}: missing '{field}'")
+                row.append(None)
+                continue
+            try:
+                row.append(convert(value))
+            except (TypeError, ValueError) as e:
+                raise ValueError(f"record {number}: bad '{field}': {e}") from None
+        if kind == 'reservations' and row[3] <= row[2]:
+            raise ValueError(f"record {number}: checkOut must be after checkIn")
+        yield tuple(row)
+
+
+def read_csv(stream):
+    return csv.DictReader(stream)
+
+
+def read_json(stream):
+    records = json.load(stream)
+    if not isinstance(records, list):
+        raise ValueError("expected a JSON array of records")
+    return records
+
+
+def import_records(kind, records, chunk_size=models.BULK_CHUNK_SIZE):
+    """Load records of the given kind; returns the number of rows inserted.
+
+    Raises models.BulkLoadError, carrying the number of leading records
+    already committed, if a record or a chunk fails.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"unknown kind '{kind}'")
+    loader = KINDS[kind][0]
+    return loader(parse_records(kind, records), chunk_size=chunk_size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk load rooms, customers or reservations.")
+    parser.add_argument('kind', choices=sorted(KINDS))
+    parser.add_argument('path', help="CSV or JSON file, or - for standard input")
+    parser.add_argument('--format', choices=('csv', 'json'),
+                        help="input format (default: from the file extension, else csv)")
+    parser.add_argument('--database', default=models.DATABASE)
+    parser.add_argument('--chunk-size', type=int, default=models.BULK_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    input_format = args.format or ('json' if args.path.lower().endswith('.json') else 'csv')
+    models.configure_pool(args.database)
+    models.create_tables()
+    stream = sys.stdin if args.path == '-' else open(args.path, newline='', encoding='utf-8')
+    try:
+        records = read_json(stream) if input_format == 'json' else read_csv(stream)
+        count = import_records(args.kind, records, args.chunk_size)
+    except (ValueError, sqlite3.Error, models.BulkLoadError) as e:
+        print(f"Import failed: {e}")
+        return 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    print(f"Imported {count} {args.kind}.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Thread-aware SQLite connection pool used by Models.
+#
+# Each thread holds at most one connection at a time: nested acquire() calls on
+# the same thread return the connection it already holds, so a Flask request
+# that acquires a connection up front shares it with every Models helper it
+# calls. Released connections go back to an idle stack instead of being closed.
+# Databases in `attach` ({schema name: path}) are attached to every connection,
+# with the same journal mode and synchronous setting as the main database.
+
+
+class ConnectionPool:
+    def __init__(self, database='hotel.db', pool_size=5, timeout=5.0,
+                 journal_mode='WAL', synchronous='NORMAL', cache_size=-8000,
+                 mmap_size=64 * 1024 * 1024, cached_statements=256, attach=None):
+        self.database = database
+        self.attach = dict(attach or {})
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.cache_size = cache_size
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self._idle = queue.LifoQueue()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._closed = False
+        self.opened = 0
+
+    def _connect(self):
+        """Open a new connection and apply the configured pragmas."""
+        # isolation_level=None leaves transaction control to Models: single
+        # statements autocommit, multi-statement work uses an explicit BEGIN.
+        conn = sqlite3.connect(self.database, timeout=self.timeout,
+                               isolation_level=None, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        for name, path in self.attach.items():
+            conn.execute('ATTACH DATABASE ? AS ' + name, (path,))
+        for schema in ['main'] + list(self.attach):
+            if self.journal_mode:
+                conn.execute(f'PRAGMA {schema}.journal_mode = {self.journal_mode}')
+            if self.synchronous:
+                conn.execute(f'PRAGMA {schema}.synchronous = {self.synchronous}')
+        if self.cache_size:
+            conn.execute(f'PRAGMA cache_size = {int(self.cache_size)}')
+        if self.mmap_size:
+            conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        conn.execute('PRAGMA foreign_keys = OFF')
+        with self._lock:
+            self.opened += 1
+        return conn
+
+    def _checkout(self):
+        """Take an idle connection, open a new one, or wait for a release."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._open < self.pool_size:
+                self._open += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                return self._connect()
+            except sqlite3.Error:
+                with self._lock:
+                    self._open -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f"connection pool exhausted ({self.pool_size} connections in use)")
+
+    def acquire(self):
+        """Return this thread's connection, checking one out if it has none."""
+        if self._closed:
+            raise sqlite3.ProgrammingError("connection pool is closed")
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.depth += 1
+            return conn
+        conn = self._checkout()
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self):
+        """Give back one acquire(); the last release returns the connection to the pool."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        self._local.depth -= 1
+        if self._local.depth > 0:
+            return
+        self._local.conn = None
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            with self._lock:
+                self._open -= 1
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager around acquire()/release()."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.pool_size,
+                'open': self._open,
+                'idle': self._idle.qsize(),
+                'opened': self.opened,
+            }
+
+    def close(self):
+        """Close every idle connection; connections still in use close on release."""
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._open -= 1
@@ -1,35 +1,42 @@
 import Models as models
-from datetime import datetime
+import billing
+from datetime import datetime, date, timedelta
 
 # built version of filter , map
+#
+# The i* variants are lazy: they pull one item at a time from any iterable
+# (lists, tuples, generators, DB cursors) and use constant stack depth.
+# map_bltin/filter_bltin materialize the result for callers that need a list.
+
+def imap_bltin(func, data):
+    for item in data:
+        yield func(item)
+
+def ifilter_bltin(things, condition_fn):
+    for thing in things:
+        if condition_fn(thing):
+            yield thing
 
 def map_bltin(func, data):
-    if not data:  
-        return []
-    return [func(data[0])] + map_bltin(func, data[1:])
+    return list(imap_bltin(func, data))
 
 def filter_bltin(things, condition_fn):
-    if not things:  # Base case: empty list
-        return []
-    # Check if the first room satisfies the condition
-    if condition_fn(things[0]):
-        return [things[0]] + filter_bltin(things[1:], condition_fn)
-    # Skip the current room if the condition is not met
-    return filter_bltin(things[1:], condition_fn)
+    return list(ifilter_bltin(things, condition_fn))
 
 def reduce_bltin(func, data, initial):
-    if not data:  # Base case: empty list
-        return initial
-    # Apply the function to the accumulator and the first element
-    return reduce_bltin(func, data[1:], func(initial, data[0]))
+    acc = initial
+    for item in data:
+        acc = func(acc, item)
+    return acc
 
 
 # Main Application Functions
 
-# Retrieve and display available rooms.
-def available_rooms():
-    rooms = models.get_rooms()
-    return tuple(filter_bltin(rooms, lambda room: room["availability"]))
+# Retrieve rooms free for a stay (tonight by default).
+def available_rooms(check_in=None, check_out=None):
+    check_in = check_in or date.today().isoformat()
+    check_out = check_out or (date.fromisoformat(check_in) + timedelta(days=1)).isoformat()
+    return tuple(models.get_available_rooms(check_in, check_out))
 
 # Get reservation details from the user.
 def input_reservation_details():  
@@ -51,8 +58,7 @@ def make_reservation():
 
     print("\nAvailable rooms:")
     transform_fn = lambda room: f"Room {room['roomNumber']} - {room['roomType']} - ${room['price']}"
-    room_info = tuple(map_bltin(transform_fn,rooms))    
-    print("\n".join(room_info))
+    print("\n".join(imap_bltin(transform_fn, rooms)))
 
     try:
         reservation_details = input_reservation_details()
@@ -76,8 +82,7 @@ def make_reservation():
 def checkout():
     try:
         room_number = int(input("Enter room number to check out: "))
-        message = models.delete_reservation_from_db(room_number)
-        print(message)
+        models.checkout(room_number)
     except ValueError:
         print("Invalid input. Please enter a valid room number.")
     except Exception as e:
@@ -119,7 +124,7 @@ def add_customer():
 # Get and display customers inforamtion.
 def show_customers():
     try:
-        customers = models.get_customers()
+        customers = models.get_customers_with_reservations()
         print("\nList of Customers:")
 
         # Map over customers to print their details
@@ -131,11 +136,11 @@ def show_customers():
 def print_customer_details(customer):
     """Print details of a single customer and their reservations."""
     print(f"ID: {customer['id']}, Name: {customer['name']}, Contact: {customer['contact']}, Payment: {customer['payment']}")
-    reservations = models.get_reservations_for_customer(customer['id'])
+    reservations = customer['reservations'] if 'reservations' in customer else models.get_reservations_for_customer(customer['id'])
     
     if reservations:
         print("  Rooms rented:")
-        transform_fn = lambda reservation: print(f"    Room {reservation[0]} - {reservation[1]}")
+        transform_fn = lambda reservation: print(f"    Room {reservation['roomNumber']} - {reservation['roomType']}")
         map_bltin(transform_fn, reservations)
     else:
         print("  No rooms rented.")
@@ -153,73 +158,62 @@ def delete_customer():
 
  #Function to calculate and show the customer's bill based on reservations.
 def show_bill(customer_id):
-   
-    reservations = models.get_reservations_for_customer(customer_id)
-    if not reservations:
+    bill = billing.bill_for_customer(customer_id)
+    if not bill["stays"]:
         print("No reservations found for this customer.")
         return
-    
-    def calculate_total_bill(reservations, get_rooms):
-        def compute_bill(reservation):
-            room_number, room_type, check_in, check_out = reservation
-            room = models.find(get_rooms(), lambda x: x["roomNumber"] == room_number)
-            if room:
-                room_price = room["price"]
-                days_stayed = (datetime.strptime(check_out, "%Y-%m-%d") - datetime.strptime(check_in, "%Y-%m-%d")).days
-                return room_price * days_stayed
-            return 0
-        transform_fn = lambda acc, reservation: acc + compute_bill(reservation)
-        return reduce_bltin(transform_fn, reservations, 0)
-    total_bill = calculate_total_bill(reservations,models.get_rooms)    
-    print(f"Total bill for customer {customer_id}: ${total_bill}")
+    print(f"Total bill for customer {customer_id}: ${bill['total']}")
 
 
 # Menu options.
-models.create_tables()  # Run this once to create the tables
-
-# Main loop for manual testing
-while True:
-    print("\nMenu:")
-    print("1. Add Customer")
-    print("2. Make Reservation")
-    print("3. Check Out")
-    print("4. View Available Rooms")
-    print("5. Add Room")
-    print("6. Delete Room")
-    print("7. Show Customers")
-    print("8. Delete Customer")
-    print("9. Show Bill")
-    print("10. Exit")
+def main():
+    models.create_tables()  # Brings the schema up to date; a no-op once it is
+
+    # Main loop for manual testing
+    while True:
+        print("\nMenu:")
+        print("1. Add Customer")
+        print("2. Make Reservation")
+        print("3. Check Out")
+        print("4. View Available Rooms")
+        print("5. Add Room")
+        print("6. Delete Room")
+        print("7. Show Customers")
+        print("8. Delete Customer")
+        print("9. Show Bill")
+        print("10. Exit")
     
-    try:
-        choice = input("Choose an option: ")
-        if choice == "1":
-            add_customer()
-        elif choice == "2":
-            make_reservation()
-        elif choice == "3":
-            checkout()
-        elif choice == "4":
-            rooms = models.get_rooms()
-            print("\nAvailable Rooms:")
-            for room in rooms:
-                if room["availability"]:
-                    print(f"Room {room['roomNumber']} - {room['roomType']} - ${room['price']}")
-        elif choice == "5":
-            add_room()
-        elif choice == "6":
-            delete_room()
-        elif choice == "7":
-            show_customers()
-        elif choice == "8":
-            delete_customer()
-        elif choice == "9":
-            customer_id = int(input("Enter customer ID to view the bill: "))
-            show_bill(customer_id)
-        elif choice == "10":
-            print("Exiting...")
-            break
-        else:
-            print("Invalid option, please try again.")
-    except Exception as e:
-        print(f"Unexpected error: {e}")
+        try:
+            choice = input("Choose an option: ")
+            if choice == "1":
+                add_customer()
+            elif choice == "2":
+                make_reservation()
+            elif choice == "3":
+                checkout()
+            elif choice == "4":
+                print("\nAvailable Rooms:")
+                transform_fn = lambda room: f"Room {room['roomNumber']} - {room['roomType']} - ${room['price']}"
+                print("\n".join(imap_bltin(transform_fn, available_rooms())))
+            elif choice == "5":
+                add_room()
+            elif choice == "6":
+                delete_room()
+            elif choice == "7":
+                show_customers()
+            elif choice == "8":
+                delete_customer()
+            elif choice == "9":
+                customer_id = int(input("Enter customer ID to view the bill: "))
+                show_bill(customer_id)
+            elif choice == "10":
+                print("Exiting...")
+                break
+            else:
+                print("Invalid option, please try again.")
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,34 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useRef } from 'react';
 import axios from 'axios'
 import Table from './Table';
+import useChangeFeed, { applyChange } from './useChangeFeed';
+const PAGE_SIZE = 100;
+
 const Customers = () => {
 
     const [customers, SetCustomers] = React.useState([]);
+    const [nextAfter, setNextAfter] = useState(null);
+    const complete = useRef(false);
+
+    // Fetch one page at a time; X-Next-After carries the cursor for the next one.
+    const fetchCustomers = async (after) => {
+        try{
+            const response = await axios.get('http://127.0.0.1:5000/Customers', {
+                params: { limit: PAGE_SIZE, after: after ?? undefined },
+            });
 
-    useEffect(() =>{
-        const fetchCustomers = async () => {
-            try{
-                const response = await axios.get('http://127.0.0.1:5000/Customers');
+            SetCustomers((previous) => (after == null ? response.data : [...previous, ...response.data]));
+            setNextAfter(response.headers['x-next-after'] ?? null);
+            complete.current = response.headers['x-next-after'] == null;
+        } catch (error) {
+            console.error('Error fetching Customers', error);
+        }
+    };
 
-                SetCustomers(response.data);
-            } catch (error) {
-                console.error('Error fetching Customers', error);
-            }
-        };
-        fetchCustomers();
-    })
+    // Load the first page, then apply changes as they are committed.
+    useChangeFeed('customer', () => fetchCustomers(null), (change) =>
+        SetCustomers((previous) => applyChange(previous, change, 'id', complete.current))
+    );
 
 
     const columns = [
@@ -41,7 +53,16 @@ const Customers = () => {
 
 
 
-  return <Table data={customers} columns={columns} title="Customers" />;
+  return (
+    <>
+      <Table data={customers} columns={columns} title="Customers" />
+      {nextAfter && (
+        <button className="m-4 px-4 py-2 border border-gray-300 rounded" onClick={() => fetchCustomers(nextAfter)}>
+          Load more
+        </button>
+      )}
+    </>
+  );
 }
 
 export default Customers
\ No newline at end of file
@@ -1,21 +1,34 @@
-import React, { useEffect, useState } from 'react';
+import React, { useRef, useState } from 'react';
 import axios from 'axios';
 import Table from './Table';
+import useChangeFeed, { applyChange } from './useChangeFeed';
+
+const PAGE_SIZE = 100;
 
 const Rooms = () => {
   const [rooms, setRooms] = useState([]);
+  const [nextAfter, setNextAfter] = useState(null);
+  const complete = useRef(false);
+
+  // Rooms are fetched a page at a time; the API returns the cursor for the
+  // next page in the X-Next-After header.
+  const fetchRooms = async (after) => {
+    try {
+      const response = await axios.get('http://127.0.0.1:5000/', {
+        params: { limit: PAGE_SIZE, after: after ?? undefined },
+      });
+      setRooms((previous) => (after == null ? response.data : [...previous, ...response.data]));
+      setNextAfter(response.headers['x-next-after'] ?? null);
+      complete.current = response.headers['x-next-after'] == null;
+    } catch (error) {
+      console.error('Error fetching rooms', error);
+    }
+  };
 
-  useEffect(() => {
-    const fetchRooms = async () => {
-      try {
-        const response = await axios.get('http://127.0.0.1:5000/');
-        setRooms(response.data);
-      } catch (error) {
-        console.error('Error fetching rooms', error);
-      }
-    };
-    fetchRooms();
-  }, []);
+  // Load the first page, then apply changes as they are committed.
+  useChangeFeed('room', () => fetchRooms(null), (change) =>
+    setRooms((previous) => applyChange(previous, change, 'roomNumber', complete.current)),
+  );
 
   // Define the columns for the table
   const columns = [
@@ -39,7 +52,16 @@ const Rooms = () => {
     },
   ];
 
-  return <Table data={rooms} columns={columns} title="Available Rooms" />;
+  return (
+    <>
+      <Table data={rooms} columns={columns} title="Available Rooms" />
+      {nextAfter && (
+        <button className="m-4 px-4 py-2 border border-gray-300 rounded" onClick={() => fetchRooms(nextAfter)}>
+          Load more
+        </button>
+      )}
+    </>
+  );
 };
 
 export default Rooms;
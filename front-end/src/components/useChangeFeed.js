@@ -0,0 +1,57 @@
+import { useEffect, useRef } from 'react';
+import axios from 'axios';
+
+const API_URL = 'http://127.0.0.1:5000';
+
+// Keeps a list in sync through the API's change feed instead of re-fetching it.
+// The feed cursor is taken before reload() runs, so nothing committed while the
+// list loads is missed; every change after it is passed to onChange. A 'reset'
+// (bulk load, or a cursor too old) means the list has to be loaded again.
+const useChangeFeed = (entity, reload, onChange) => {
+  const handlers = useRef({ reload, onChange });
+  handlers.current = { reload, onChange };
+
+  useEffect(() => {
+    let source = null;
+    let closed = false;
+
+    const subscribe = async () => {
+      try {
+        const response = await axios.get(`${API_URL}/changes`, { params: { entity } });
+        await handlers.current.reload();
+        if (closed) return;
+        source = new EventSource(`${API_URL}/changes?entity=${entity}&since=${response.data.last}`);
+        source.addEventListener('change', (event) => {
+          const change = JSON.parse(event.data);
+          if (change.op === 'reset') {
+            handlers.current.reload();
+          } else {
+            handlers.current.onChange(change);
+          }
+        });
+        source.addEventListener('reset', () => handlers.current.reload());
+      } catch (error) {
+        console.error(`Error subscribing to ${entity} changes`, error);
+      }
+    };
+
+    subscribe();
+    return () => {
+      closed = true;
+      if (source) source.close();
+    };
+  }, [entity]);
+};
+
+// Applies one upsert/delete to rows sorted by `key`. Rows past the last one
+// loaded are left for "Load more" unless the whole list is loaded.
+export const applyChange = (rows, change, key, complete) => {
+  const rest = rows.filter((row) => row[key] !== change.key);
+  if (change.op === 'delete') return rest;
+  const last = rows.length ? rows[rows.length - 1][key] : null;
+  if (!complete && (last === null || change.key > last)) return rest;
+  const index = rest.findIndex((row) => row[key] > change.key);
+  return index === -1 ? [...rest, change.data] : [...rest.slice(0, index), change.data, ...rest.slice(index)];
+};
+
+export default useChangeFeed;
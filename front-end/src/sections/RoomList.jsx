@@ -1,23 +1,23 @@
-import React, { useEffect, useState } from 'react'
+import React, { useState } from 'react'
 import RoomCard from '../components/RoomCard'
+import useChangeFeed, { applyChange } from '../components/useChangeFeed'
 
 const RoomList = () => {
     const [rooms, setRooms] = useState([]);
-    useEffect (() => {
-        const fetchRooms = async () => {
-            try {
-                const response = await fetch ("http://127.0.0.1:5000/");
-                const data = await response.json();
-                setRooms(data);
-            } catch(error) {
-                console.error('Error fetching rooms', error);
-            }
-        };
-        fetchRooms();
-    })
-
+    const fetchRooms = async () => {
+        try {
+            const response = await fetch ("http://127.0.0.1:5000/");
+            const data = await response.json();
+            setRooms(data);
+        } catch(error) {
+            console.error('Error fetching rooms', error);
+        }
+    };
+    // Fetched once; after that only the rooms that change are sent.
+    useChangeFeed('room', fetchRooms, (change) =>
+        setRooms((previous) => applyChange(previous, change, 'roomNumber', true))
+    );
 
-    
     return (
         <div className="grid grid-cols-1 sm:grid-cols-2 md:grid-cols-3 gap-4 p-4">
           {rooms.map((room) => (
@@ -1,5 +1,6 @@
 import Models as models
-from datetime import datetime
+import billing
+from datetime import date, timedelta
 # Main Application Functions
 
 def add_customer():
@@ -12,10 +13,13 @@ def add_customer():
     except Exception as e:
         print(f"Error adding customer: {e}")
 
-def available_rooms():
-    """Retrieve and display available rooms."""
-    rooms = models.get_rooms()
-    return [room for room in rooms if room["availability"]]
+def available_rooms(check_in=None, check_out=None):
+    """Retrieve rooms free for a stay (tonight by default)."""
+    if check_in is None:
+        check_in = date.today().isoformat()
+    if check_out is None:
+        check_out = (date.fromisoformat(check_in) + timedelta(days=1)).isoformat()
+    return models.get_available_rooms(check_in, check_out)
 
 def input_reservation_details():
     """Get reservation details from the user."""
@@ -60,8 +64,7 @@ def make_reservation():
 def checkout():
     try:
         room_number = int(input("Enter room number to check out: "))
-        message = models.delete_reservation_from_db(room_number)
-        print(message)
+        models.checkout(room_number)
     except ValueError:
         print("Invalid input. Please enter a valid room number.")
     except Exception as e:
@@ -90,15 +93,15 @@ def delete_room():
 
 def show_customers():
     try:
-        customers = models.get_customers()
+        customers = models.get_customers_with_reservations()
         print("\nList of Customers:")
         for customer in customers:
             print(f"ID: {customer['id']}, Name: {customer['name']}, Contact: {customer['contact']}, Payment: {customer['payment']}")
-            reservations = models.get_reservations_for_customer(customer['id'])
+            reservations = customer['reservations']
             if reservations:
                 print("  Rooms rented:")
                 for reservation in reservations:
-                    print(f"    Room {reservation[0]} - {reservation[1]}")
+                    print(f"    Room {reservation['roomNumber']} - {reservation['roomType']}")
             else:
                 print("  No rooms rented.")
     except Exception as e:
@@ -115,80 +118,63 @@ def delete_customer():
 
 def show_bill(customer_id):
     """Function to calculate and show the customer's bill based on reservations."""
-    # Get reservations for the customer
-    reservations = models.get_reservations_for_customer(customer_id)
-    if not reservations:
+    bill = billing.bill_for_customer(customer_id)
+    if bill["stays"] == 0:
         print("No reservations found for this customer.")
         return
 
-    total_bill = 0
-
-    # Iterate through reservations
-    for reservation in reservations:
-        room_number = reservation[0]
-        check_in = reservation[2]
-        check_out = reservation[3]
-
-        # Look up the room directly
-        rooms = models.get_rooms()
-        room = None
-        for r in rooms:
-            if r["roomNumber"] == room_number:
-                room = r
-                break
-        if room:
-            room_price = room["price"]  
-            days_stayed = (datetime.strptime(check_out, "%Y-%m-%d") - datetime.strptime(check_in, "%Y-%m-%d")).days
-            total_bill += room_price * days_stayed
-    
-    print(f"Total bill for customer {customer_id}: ${total_bill}")
+    print(f"Total bill for customer {customer_id}: ${bill['total']}")
 
 # Run the setup
-models.create_tables()  # Run this once to create the tables
-
-# Main loop for manual testing
-while __name__ =="__main__":
-    print("\nMenu:")
-    print("1. Add Customer")
-    print("2. Make Reservation")
-    print("3. Check Out")
-    print("4. View Available Rooms")
-    print("5. Add Room")
-    print("6. Delete Room")
-    print("7. Show Customers")
-    print("8. Delete Customer")
-    print("9. Show Bill")
-    print("10. Exit")
+def main():
+    models.create_tables()  # Brings the schema up to date; a no-op once it is
+
+    # Main loop for manual testing
+    while True:
+        print("\nMenu:")
+        print("1. Add Customer")
+        print("2. Make Reservation")
+        print("3. Check Out")
+        print("4. View Available Rooms")
+        print("5. Add Room")
+        print("6. Delete Room")
+        print("7. Show Customers")
+        print("8. Delete Customer")
+        print("9. Show Bill")
+        print("10. Exit")
     
-    try:
-        choice = input("Choose an option: ")
-        if choice == "1":
-            add_customer()
-        elif choice == "2":
-            make_reservation()
-        elif choice == "3":
-            checkout()
-        elif choice == "4":
-            rooms = models.get_rooms()
-            print("\nAvailable Rooms:")
-            for room in rooms:
-                if room["availability"]:
+        try:
+            choice = input("Choose an option: ")
+            if choice == "1":
+                add_customer()
+            elif choice == "2":
+                make_reservation()
+            elif choice == "3":
+                checkout()
+            elif choice == "4":
+                rooms = available_rooms()
+                print("\nAvailable Rooms:")
+                for room in rooms:
                     print(f"Room {room['roomNumber']} - {room['roomType']} - ${room['price']}")
-        elif choice == "5":
-            add_room()
-        elif choice == "6":
-            delete_room()
-        elif choice == "7":
-            show_customers()
-        elif choice == "8":
-            delete_customer()
-        elif choice == "9":
-            customer_id = int(input("Enter customer ID to view the bill: "))
-            show_bill(customer_id)
-        elif choice == "10":
-            print("Exiting...")
-            break
-        else:
-            print("Invalid option, please try again.")
-    except Exception as e:
-        print(f"Unexpected error: {e}")
+            elif choice == "5":
+                add_room()
+            elif choice == "6":
+                delete_room()
+            elif choice == "7":
+                show_customers()
+            elif choice == "8":
+                delete_customer()
+            elif choice == "9":
+                customer_id = int(input("Enter customer ID to view the bill: "))
+                show_bill(customer_id)
+            elif choice == "10":
+                print("Exiting...")
+                break
+            else:
+                print("Invalid option, please try again.")
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+
+
+if __name__ == "__main__":
+    main()
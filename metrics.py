@@ -0,0 +1,146 @@
+import bisect
+import logging
+import re
+import threading
+from functools import lru_cache
+
+# In-process instrumentation for the API and Models.
+#
+# Models records every statement it runs (query text, rows, duration) and the
+# API records every request; render() writes the totals in the Prometheus text
+# exposition format for GET /metrics. Statements slower than
+# `slow_query_threshold` seconds are also logged on the "hotel.slowquery"
+# logger at WARNING level.
+
+slow_query_log = logging.getLogger('hotel.slowquery')
+
+# Seconds; Prometheus' default buckets, plus finer ones for sub-millisecond SQL.
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+IN_LIST = re.compile(r'\bIN ?\( ?\?(?: ?, ?\?)* ?\)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def normalize_query(query):
+    """Collapse whitespace and `IN (?, ?, ...)` lists, so one statement gets one series
+    however it is indented and however many values it is given."""
+    return IN_LIST.sub('IN (?, ...)', re.sub(r'\s+', ' ', query).strip())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    return ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class Histogram:
+    """Cumulative-bucket histogram of durations in seconds."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def samples(self, name, label_text):
+        """Yield the _bucket, _sum and _count lines for one labelled series."""
+        prefix = label_text + ',' if label_text else ''
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}'
+        suffix = f'{{{label_text}}}' if label_text else ''
+        yield f'{name}_sum{suffix} {self.sum:.6f}'
+        yield f'{name}_count{suffix} {self.count}'
+
+
+class Metrics:
+    def __init__(self, slow_query_threshold=0.1):
+        self.slow_query_threshold = slow_query_threshold
+        self._requests = {}
+        self._queries = {}
+        self._query_rows = {}
+        self.slow_queries = 0
+        self.query_errors = 0
+        self._lock = threading.Lock()
+
+    def observe_request(self, method, endpoint, status, seconds):
+        key = (method, endpoint, str(status))
+        with self._lock:
+            histogram = self._requests.get(key)
+            if histogram is None:
+                histogram = self._requests[key] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_query(self, query, rows, seconds):
+        """Record one statement; rows is the number fetched, or changed for a write."""
+        query = normalize_query(query)
+        with self._lock:
+            histogram = self._queries.get(query)
+            if histogram is None:
+                histogram = self._queries[query] = Histogram()
+            histogram.observe(seconds)
+            self._query_rows[query] = self._query_rows.get(query, 0) + rows
+            slow = seconds >= self.slow_query_threshold
+            if slow:
+                self.slow_queries += 1
+        if slow:
+            slow_query_log.warning("slow query (%.1f ms, %d rows): %s", seconds * 1000, rows, query)
+
+    def observe_error(self):
+        """Count a statement that failed (the caller reports the error)."""
+        with self._lock:
+            self.query_errors += 1
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._queries.clear()
+            self._query_rows.clear()
+            self.slow_queries = 0
+            self.query_errors = 0
+
+    def render(self, gauges=()):
+        """Prometheus text format; gauges is an iterable of (name, help, value).
+
+        value is a number, or a list of (labels dict, number) for a labelled series.
+        """
+        lines = []
+        with self._lock:
+            lines += ['# HELP hotel_http_request_duration_seconds Time spent handling API requests.',
+                      '# TYPE hotel_http_request_duration_seconds histogram']
+            for key, histogram in sorted(self._requests.items()):
+                lines += histogram.samples('hotel_http_request_duration_seconds',
+                                           _labels(('method', 'endpoint', 'status'), key))
+            lines += ['# HELP hotel_db_query_duration_seconds Time spent executing SQL statements.',
+                      '# TYPE hotel_db_query_duration_seconds histogram']
+            for query, histogram in sorted(self._queries.items()):
+                lines += histogram.samples('hotel_db_query_duration_seconds', _labels(('query',), (query,)))
+            lines += ['# HELP hotel_db_query_rows_total Rows fetched or changed by SQL statements.',
+                      '# TYPE hotel_db_query_rows_total counter']
+            for query, rows in sorted(self._query_rows.items()):
+                lines.append(f'hotel_db_query_rows_total{{{_labels(("query",), (query,))}}} {rows}')
+            lines += ['# HELP hotel_db_slow_queries_total Statements slower than the slow-query threshold.',
+                      '# TYPE hotel_db_slow_queries_total counter',
+                      f'hotel_db_slow_queries_total {self.slow_queries}',
+                      '# HELP hotel_db_query_errors_total Statements that failed in execute_query.',
+                      '# TYPE hotel_db_query_errors_total counter',
+                      f'hotel_db_query_errors_total {self.query_errors}']
+        for name, help_text, value in gauges:
+            kind = 'counter' if name.endswith('_total') else 'gauge'
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            if isinstance(value, list):
+                lines += [f'{name}{{{_labels(labels, labels.values())}}} {sample}' for labels, sample in value]
+            else:
+                lines.append(f'{name} {value}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+# Read-through cache for the Models readers.
+#
+# Entries expire after `ttl` seconds and the least recently used entry is
+# evicted once `max_entries` is reached. Any committed write calls
+# invalidate(), which drops everything and bumps `version`. Cached values are
+# shared between callers and must be treated as read-only. If `scope` is given,
+# its result is part of every key, so callers reading different databases never
+# share entries.
+#
+# `marker`, if given, returns a value that changes with every write to the data
+# (in Models, the change feed's latest sequence number), so writes made by
+# other processes invalidate the cache too; it is checked on every cached
+# call, and a None marker bypasses the cache. A call during which discard()
+# was called (Models does on a query error) is not cached.
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    return value
+
+
+class QueryCache:
+    def __init__(self, max_entries=256, ttl=30.0, scope=None, marker=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.scope = scope
+        self.marker = marker
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._markers = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (True, value) for a live entry, (False, None) otherwise."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value, version=None):
+        """Store value; skipped when the data changed since `version` was read."""
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def check_marker(self, marker, scope=None):
+        """Invalidate if the data's marker (for this scope) changed since it was last checked."""
+        with self._lock:
+            previous = self._markers.get(scope, marker)
+            self._markers[scope] = marker
+        if previous != marker:
+            self.invalidate()
+
+    def discard(self):
+        """Keep the result being computed on this thread (by cached) out of the cache."""
+        self._local.discard = True
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self.version += 1
+            self.invalidations += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'version': self.version,
+            }
+
+    def cached(self, fn):
+        """Decorator: cache fn's result per (name, arguments)."""
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = (fn.__name__, _freeze(args), _freeze(kwargs))
+            scope = None
+            if self.scope is not None:
+                scope = self.scope()
+                key += (scope,)
+            if self.marker is not None:
+                marker = self.marker()
+                if marker is None:
+                    return fn(*args, **kwargs)
+                self.check_marker(marker, scope)
+            found, value = self.get(key)
+            if found:
+                return value
+            version = self.version
+            outer = getattr(self._local, 'discard', False)
+            self._local.discard = False
+            try:
+                value = fn(*args, **kwargs)
+            finally:
+                discarded = self._local.discard
+                # A nested call that failed spoils the outer result too.
+                self._local.discard = outer or discarded
+            if not discarded:
+                self.put(key, value, version)
+            return value
+        return wrapper
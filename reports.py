@@ -0,0 +1,166 @@
+import argparse
+import sqlite3
+import sys
+from contextlib import ExitStack
+from datetime import date, timedelta
+
+import Models as models
+
+# Management reports, served from the daily_occupancy rollup that Models keeps
+# up to date on every booking, checkout and delete. A report over a date range
+# reads one row per night and room type, however many reservations there are.
+#
+#     python reports.py rebuild [--database hotel.db] [--property lisbon]
+#     python reports.py occupancy 2025-01-01 2025-02-01
+#     python reports.py chain 2025-01-01 2025-02-01
+
+OCCUPANCY_FIELDS = ('date', 'roomType', 'rooms', 'occupied', 'occupancy', 'arrivals', 'revenue')
+
+
+def _room_counts():
+    inventory = models.get_room_inventory()
+    if inventory is not None:
+        counts = {room_type: inventory.count(room_type) for room_type in inventory.type_names}
+        return {room_type: count for room_type, count in counts.items() if count}
+    rows = models.execute_query('SELECT roomType, COUNT(*) FROM rooms GROUP BY roomType', fetch=True) or []
+    return dict(rows)
+
+
+@models.cache.cached
+def get_occupancy(check_in, check_out):
+    """Per night in [check_in, check_out) and room type: rooms, occupied, arrivals, revenue.
+
+    Returns {'days': [...], 'roomTypes': [...]}; roomTypes sums the range per
+    type, with averageStay = room nights / arrivals.
+    """
+    first, last = date.fromisoformat(check_in), date.fromisoformat(check_out)
+    if last <= first:
+        raise ValueError("check_out must be after check_in")
+    query = '''
+        SELECT day, roomType, occupied, arrivals, revenue
+        FROM daily_occupancy
+        WHERE day >= ? AND day < ?
+    '''
+    recorded = {(row[0], row[1]): row[2:] for row in
+                models.execute_query(query, (check_in, check_out), fetch=True) or []}
+    room_counts = _room_counts()
+    # Types whose rooms were all deleted still show up for the nights they were let.
+    room_types = sorted(set(room_counts) | {room_type for _, room_type in recorded})
+
+    days = []
+    totals = {room_type: [0, 0, 0] for room_type in room_types}
+    day = first
+    while day < last:
+        iso = day.isoformat()
+        for room_type in room_types:
+            occupied, arrivals, revenue = recorded.get((iso, room_type), (0, 0, 0))
+            rooms = room_counts.get(room_type, 0)
+            days.append(dict(zip(OCCUPANCY_FIELDS, (
+                iso, room_type, rooms, occupied, occupied / rooms if rooms else 0.0, arrivals, revenue))))
+            total = totals[room_type]
+            total[0] += occupied
+            total[1] += arrivals
+            total[2] += revenue
+        day += timedelta(days=1)
+
+    nights_in_range = (last - first).days
+    summary = []
+    for room_type, (room_nights, arrivals, revenue) in totals.items():
+        available = room_counts.get(room_type, 0) * nights_in_range
+        summary.append({
+            'roomType': room_type,
+            'roomNights': room_nights,
+            'occupancy': room_nights / available if available else 0.0,
+            'arrivals': arrivals,
+            'revenue': revenue,
+            'averageStay': room_nights / arrivals if arrivals else 0.0,
+        })
+    return {'days': days, 'roomTypes': summary}
+
+
+CHAIN_FIELDS = ('roomNights', 'available', 'arrivals', 'revenue')
+
+
+def _property_totals(check_in, check_out):
+    report = get_occupancy(check_in, check_out)
+    nights_in_range = (date.fromisoformat(check_out) - date.fromisoformat(check_in)).days
+    totals = dict.fromkeys(CHAIN_FIELDS, 0)
+    for row in report['roomTypes']:
+        totals['roomNights'] += row['roomNights']
+        totals['arrivals'] += row['arrivals']
+        totals['revenue'] += row['revenue']
+    totals['available'] = sum(_room_counts().values()) * nights_in_range
+    return totals
+
+
+def _with_occupancy(totals):
+    available = totals['available']
+    return dict(totals, occupancy=totals['roomNights'] / available if available else 0.0)
+
+
+def get_chain_occupancy(check_in, check_out, property_ids=None):
+    """Room nights, occupancy, arrivals and revenue per property and for the whole chain.
+
+    Each property's report is read from its own database, in parallel.
+    """
+    if date.fromisoformat(check_out) <= date.fromisoformat(check_in):
+        raise ValueError("check_out must be after check_in")
+    results = models.for_each_property(_property_totals, check_in, check_out, property_ids=property_ids)
+    chain = dict.fromkeys(CHAIN_FIELDS, 0)
+    for totals in results.values():
+        for field in CHAIN_FIELDS:
+            chain[field] += totals[field]
+    return {
+        'properties': [dict(_with_occupancy(totals), property=property_id)
+                       for property_id, totals in results.items()],
+        'chain': _with_occupancy(chain),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Occupancy and revenue reports.")
+    parser.add_argument('--database', default=models.DATABASE)
+    parser.add_argument('--property', help="report on one property's database instead")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('rebuild', help="recompute the daily occupancy rollup from all reservations")
+    occupancy = commands.add_parser('occupancy', help="print per-type totals for a date range")
+    occupancy.add_argument('check_in')
+    occupancy.add_argument('check_out')
+    chain = commands.add_parser('chain', help="print per-property totals for a date range")
+    chain.add_argument('check_in')
+    chain.add_argument('check_out')
+    args = parser.parse_args(argv)
+
+    models.configure_pool(args.database)
+    models.create_tables()
+    try:
+        with ExitStack() as stack:
+            if args.property:
+                stack.enter_context(models.use_property(args.property))
+            if args.command == 'rebuild':
+                print(f"Rebuilt {models.rebuild_occupancy()} daily occupancy rows.")
+                return 0
+            if args.command == 'chain':
+                return _print_chain(get_chain_occupancy(args.check_in, args.check_out))
+            report = get_occupancy(args.check_in, args.check_out)
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Report failed: {e}")
+        return 1
+    print(f"{'room type':<12}{'room nights':>12}{'occupancy':>11}{'arrivals':>10}{'revenue':>12}{'avg stay':>10}")
+    for row in report['roomTypes']:
+        print(f"{row['roomType']:<12}{row['roomNights']:>12}{row['occupancy']:>10.1%}"
+              f"{row['arrivals']:>10}{row['revenue']:>12}{row['averageStay']:>10.2f}")
+    return 0
+
+
+
+def _print_chain(report):
+    print(f"{'property':<16}{'room nights':>12}{'occupancy':>11}{'arrivals':>10}{'revenue':>12}")
+    for row in report['properties'] + [dict(report['chain'], property='chain')]:
+        print(f"{row['property']:<16}{row['roomNights']:>12}{row['occupancy']:>10.1%}"
+              f"{row['arrivals']:>10}{row['revenue']:>12}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,130 @@
+import argparse
+import atexit
+import logging
+import sqlite3
+import sys
+import threading
+from contextlib import ExitStack
+
+import Models as models
+
+# Scheduled archiving of old reservations (see "Archive" in Models).
+#
+# start() runs a background thread that calls models.archive_reservations() on
+# the default database and on every property every `interval` seconds. Each
+# run moves stays in short batches, so bookings made meanwhile wait at most one
+# batch for the write lock. stop() lets the current run finish its batch and
+# ends the thread; it also runs at interpreter exit. From the command line:
+#
+#     python reservationArchive.py run --horizon-days 365
+#     python reservationArchive.py status
+
+INTERVAL = 3600
+
+log = logging.getLogger(__name__)
+
+
+class Archiver:
+    def __init__(self, interval=INTERVAL, horizon_days=models.ARCHIVE_AFTER_DAYS,
+                 batch_size=models.ARCHIVE_BATCH_SIZE):
+        self.interval = interval
+        self.horizon_days = horizon_days
+        self.batch_size = batch_size
+        self.runs = 0
+        self.moved = 0
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='hotel-archiver', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._thread.join()
+
+    def run_once(self):
+        """Archive the default database and every property; returns {property id or None: stays moved}."""
+        moved = {None: self._archive()}
+        for property_id in models.list_properties():
+            if self._stopping.is_set():
+                break
+            with models.use_property(property_id):
+                moved[property_id] = self._archive()
+        self.runs += 1
+        self.moved += sum(moved.values())
+        return moved
+
+    def _archive(self):
+        try:
+            return models.archive_reservations(self.horizon_days, self.batch_size)
+        except sqlite3.Error as e:
+            log.error("Archiving %s failed: %s", models.current_property() or 'the default database', e)
+            return 0
+
+    def _run(self):
+        while not self._stopping.is_set():
+            moved = self.run_once()
+            if any(moved.values()):
+                log.info("Archived %d stays", sum(moved.values()))
+            self._stopping.wait(self.interval)
+
+
+_archiver = None
+_lock = threading.Lock()
+
+
+def start(**options):
+    """Start the shared archiver thread (interval, horizon_days, batch_size)."""
+    global _archiver
+    with _lock:
+        if _archiver is None:
+            _archiver = Archiver(**options)
+            atexit.register(stop)
+        return _archiver
+
+
+def running():
+    return _archiver is not None
+
+
+def stop():
+    global _archiver
+    with _lock:
+        archiver, _archiver = _archiver, None
+    if archiver is not None:
+        archiver.stop()
+
+
+def _status():
+    hot = models.execute_query('SELECT COUNT(*) FROM reservations', fetch=True)[0][0]
+    archived = models.execute_query('SELECT COUNT(*) FROM archive.reservations', fetch=True)[0][0]
+    print(f"{hot} hot stays, {archived} archived, archived up to {models.archived_until() or '-'}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move old reservations to the archive database.")
+    parser.add_argument('--database', default=models.DATABASE)
+    parser.add_argument('--property', help="use one property's database instead")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="archive the stays that checked out before the horizon")
+    run.add_argument('--horizon-days', type=int, default=models.ARCHIVE_AFTER_DAYS)
+    run.add_argument('--batch-size', type=int, default=models.ARCHIVE_BATCH_SIZE)
+    commands.add_parser('status', help="print the number of hot and archived stays")
+    args = parser.parse_args(argv)
+
+    models.configure_pool(args.database)
+    models.create_tables()
+    try:
+        with ExitStack() as stack:
+            if args.property:
+                stack.enter_context(models.use_property(args.property))
+            if args.command == 'run':
+                moved = models.archive_reservations(args.horizon_days, args.batch_size)
+                print(f"Archived {moved} stays.")
+            _status()
+    except (ValueError, sqlite3.Error) as e:
+        print(f"Archiving failed: {e}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
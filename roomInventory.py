@@ -0,0 +1,213 @@
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from itertools import compress
+
+_NOT_LOADED = object()
+_np = _NOT_LOADED
+
+
+def numpy():
+    """NumPy, imported on first use (it would dominate startup otherwise); None if not installed."""
+    global _np
+    if _np is _NOT_LOADED:
+        try:
+            import numpy as np
+        except ImportError:  # NumPy is optional; the pure-Python path gives the same answers.
+            np = None
+        _np = np
+    return _np
+
+# Column-oriented, in-memory copy of the rooms table.
+#
+# Each column is a typed array kept sorted by roomNumber (so lookups are a
+# bisect and no per-room dict or object exists); room types are stored as a
+# one-byte code into `type_names`. With NumPy installed the filters and
+# aggregates run as vectorized masks over zero-copy views of the arrays.
+
+
+class RoomInventory:
+    __slots__ = ('room_numbers', 'prices', 'type_codes', 'available', 'type_names', '_type_index', '_lock', 'seq',
+                 'day')
+
+    def __init__(self):
+        self.room_numbers = array('q')
+        self.prices = array('q')
+        self.type_codes = array('B')
+        self.available = array('B')
+        self.type_names = []
+        self._type_index = {}
+        self._lock = threading.RLock()
+        # Change sequence number the copy is current to, and the day its
+        # availability is for (set by Models).
+        self.seq = 0
+        self.day = None
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build from (roomNumber, roomType, price, availability) rows sorted by roomNumber."""
+        inventory = cls()
+        for room_number, room_type, price, availability in rows:
+            inventory.room_numbers.append(room_number)
+            inventory.prices.append(price or 0)
+            inventory.type_codes.append(inventory._type_code(room_type))
+            inventory.available.append(1 if availability else 0)
+        return inventory
+
+    def __len__(self):
+        return len(self.room_numbers)
+
+    def _type_code(self, room_type):
+        code = self._type_index.get(room_type)
+        if code is None:
+            if len(self.type_names) == 256:
+                raise ValueError("more than 256 distinct room types")
+            code = len(self.type_names)
+            self.type_names.append(room_type)
+            self._type_index[room_type] = code
+        return code
+
+    def _position(self, room_number):
+        i = bisect_left(self.room_numbers, room_number)
+        if i < len(self.room_numbers) and self.room_numbers[i] == room_number:
+            return i
+        return None
+
+    # Updates
+
+    def upsert(self, room_number, room_type, price, availability):
+        with self._lock:
+            code = self._type_code(room_type)
+            i = self._position(room_number)
+            if i is None:
+                i = bisect_left(self.room_numbers, room_number)
+                self.room_numbers.insert(i, room_number)
+                self.prices.insert(i, price or 0)
+                self.type_codes.insert(i, code)
+                self.available.insert(i, 1 if availability else 0)
+            else:
+                self.prices[i] = price or 0
+                self.type_codes[i] = code
+                self.available[i] = 1 if availability else 0
+
+    def remove(self, room_number):
+        with self._lock:
+            i = self._position(room_number)
+            if i is not None:
+                del self.room_numbers[i]
+                del self.prices[i]
+                del self.type_codes[i]
+                del self.available[i]
+
+    def get(self, room_number):
+        with self._lock:
+            i = self._position(room_number)
+            if i is None:
+                return None
+            return {"roomNumber": self.room_numbers[i], "roomType": self.type_names[self.type_codes[i]],
+                    "price": self.prices[i], "availability": bool(self.available[i])}
+
+    # Queries
+
+    def _mask(self, room_type, min_price, max_price, available):
+        """Selection mask for the filters; None means every room matches."""
+        code = None
+        if room_type is not None:
+            code = self._type_index.get(room_type)
+            if code is None:
+                return False
+        np = numpy()
+        if np is not None:
+            mask = None
+            if code is not None:
+                mask = np.frombuffer(self.type_codes, dtype=np.uint8) == code
+            prices = np.frombuffer(self.prices, dtype=np.int64)
+            for condition in (
+                prices >= min_price if min_price is not None else None,
+                prices <= max_price if max_price is not None else None,
+                (np.frombuffer(self.available, dtype=np.uint8) == (1 if available else 0))
+                if available is not None else None,
+            ):
+                if condition is not None:
+                    mask = condition if mask is None else mask & condition
+            return mask
+        if code is None and min_price is None and max_price is None and available is None:
+            return None
+        flag = None if available is None else (1 if available else 0)
+        return [
+            (code is None or t == code)
+            and (min_price is None or p >= min_price)
+            and (max_price is None or p <= max_price)
+            and (flag is None or a == flag)
+            for t, p, a in zip(self.type_codes, self.prices, self.available)
+        ]
+
+    def filter(self, room_type=None, min_price=None, max_price=None, available=None):
+        """Room numbers matching every given filter, ascending."""
+        with self._lock:
+            mask = self._mask(room_type, min_price, max_price, available)
+            if mask is None:
+                return list(self.room_numbers)
+            if mask is False:
+                return []
+            np = numpy()
+            if np is not None:
+                return np.frombuffer(self.room_numbers, dtype=np.int64)[mask].tolist()
+            return list(compress(self.room_numbers, mask))
+
+    def rows(self, room_type=None, min_price=None, max_price=None, available=None,
+             after=None, limit=None, exclude=()):
+        """Rooms matching every given filter as get_rooms() dicts, ascending.
+
+        after and limit page on roomNumber; room numbers in exclude are skipped.
+        """
+        with self._lock:
+            mask = self._mask(room_type, min_price, max_price, available)
+            if mask is False:
+                return []
+            start = 0 if after is None else bisect_right(self.room_numbers, after)
+            end = len(self.room_numbers)
+            if mask is None:
+                positions = range(start, end)
+            elif numpy() is not None:
+                positions = (numpy().flatnonzero(mask[start:]) + start).tolist()
+            else:
+                positions = compress(range(start, end), mask[start:])
+            rows = []
+            for i in positions:
+                if limit is not None and len(rows) >= limit:
+                    break
+                if self.room_numbers[i] in exclude:
+                    continue
+                rows.append({"roomNumber": self.room_numbers[i], "roomType": self.type_names[self.type_codes[i]],
+                             "price": self.prices[i], "availability": self.available[i]})
+            return rows
+
+    def count(self, room_type=None, min_price=None, max_price=None, available=None):
+        with self._lock:
+            mask = self._mask(room_type, min_price, max_price, available)
+            if mask is None:
+                return len(self.room_numbers)
+            if mask is False:
+                return 0
+            return int(mask.sum()) if numpy() is not None else sum(mask)
+
+    def occupancy_rate(self, room_type=None):
+        """Share of rooms (of a type) occupied tonight."""
+        total = self.count(room_type)
+        if not total:
+            return 0.0
+        return 1 - self.count(room_type, available=True) / total
+
+    def revenue_per_available_room(self, room_type=None):
+        """Tonight's room revenue divided by the number of rooms (RevPAR)."""
+        with self._lock:
+            total = self.count(room_type)
+            if not total:
+                return 0.0
+            occupied = self._mask(room_type, None, None, False)
+            np = numpy()
+            if np is not None:
+                prices = np.frombuffer(self.prices, dtype=np.int64)
+                return float(prices[occupied].sum()) / total
+            return sum(compress(self.prices, occupied)) / total
@@ -0,0 +1,275 @@
+from datetime import date
+from functools import lru_cache, wraps
+
+# Request validation and response serialization for the API.
+#
+# A Serializer is built once per resource from {name: type} (int, str, bool,
+# float, a nested Serializer, or [Serializer] for a list of them) and compiles
+# a function that turns one row into the response dict with one dict display,
+# instead of flask_restful's marshal looking up a field object per value. The
+# output matches marshal's: a missing or None int becomes 0, other missing
+# values None, and a nested object that is missing has all its defaults.
+#
+# A RequestSchema reads the JSON body (or form/query values) or the query
+# string and converts each argument with a plain function such as integer,
+# boolean or iso_date, raising Invalid with {argument: message} on bad input.
+#
+# The resource schemas at the end are shared by the Flask API (apiSupport.py),
+# the ASGI API (asgiApp.py) and bulkImport.py, so all three accept the same
+# values and answer with the same fields.
+
+_DEFAULTS = {int: '0', str: 'None', bool: 'None', float: 'None'}
+_FAST_TYPES = {int: 'int', str: 'str', float: 'float'}
+
+
+class Serializer:
+    def __init__(self, spec):
+        self.spec = dict(spec)
+        self.one = self._compile(tuple(self.spec))
+        self._projections = {}
+
+    def extend(self, **more):
+        return Serializer(dict(self.spec, **more))
+
+    def only(self, names):
+        """Serializer for the spec fields in names (all of them when names is empty)."""
+        if not names:
+            return self
+        key = frozenset(names)
+        projection = self._projections.get(key)
+        if projection is None:
+            projection = Serializer({name: kind for name, kind in self.spec.items() if name in key})
+            self._projections[key] = projection
+        return projection
+
+    def __call__(self, data):
+        """Serialize a row, or each row of a list or tuple."""
+        if isinstance(data, (list, tuple)):
+            one = self.one
+            return [one(row) for row in data]
+        return self.one(data)
+
+    def _compile(self, names):
+        namespace = {'_as_row': _as_row}
+        items = []
+        for index, name in enumerate(names):
+            kind = self.spec[name]
+            value = f'get({name!r})'
+            if isinstance(kind, Serializer):
+                namespace[f'_nested{index}'] = kind.one
+                items.append(f'{name!r}: _nested{index}({value})')
+            elif isinstance(kind, list):
+                namespace[f'_nested{index}'] = kind[0]
+                items.append(f'{name!r}: None if (v := {value}) is None else _nested{index}(v)')
+            elif kind is bool:
+                items.append(f'{name!r}: None if (v := {value}) is None else bool(v)')
+            else:
+                # Values from SQLite usually have the right type already.
+                fast = _FAST_TYPES[kind]
+                items.append(f'{name!r}: {_DEFAULTS[kind]} if (v := {value}) is None '
+                             f'else v if v.__class__ is {fast} else {fast}(v)')
+        source = ('def serialize(row):\n'
+                  '    get = _as_row(row).get\n'
+                  '    return {' + ', '.join(items) + '}\n')
+        exec(source, namespace)
+        return namespace['serialize']
+
+
+_EMPTY = {}
+
+
+def _as_row(row):
+    # Anything but a dict (a bare status code, None) serializes to the defaults.
+    return row if isinstance(row, dict) else _EMPTY
+
+
+def responds_with(serializer):
+    """Decorator: serialize a handler's return value, like flask_restful's marshal_with."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            result = fn(*args, **kwargs)
+            if isinstance(result, tuple):
+                return (serializer(result[0]),) + result[1:]
+            return serializer(result)
+        return wrapper
+    return decorate
+
+
+# Argument converters: take the raw value, return the converted one or raise ValueError.
+
+def integer(value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError("must be an integer")
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError("must be an integer") from None
+
+
+def natural(value):
+    value = integer(value)
+    if value < 0:
+        raise ValueError("must be zero or more")
+    return value
+
+
+@lru_cache(maxsize=None)
+def int_range(low, high):
+    def convert(value):
+        value = integer(value)
+        if not low <= value <= high:
+            raise ValueError(f"must be between {low} and {high}")
+        return value
+    return convert
+
+
+def string(value):
+    # Numbers are accepted as text (a phone number sent as a JSON number).
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ValueError("must be a string")
+    return str(value)
+
+
+_TRUE = {'true', '1', 'yes', 'on'}
+_FALSE = {'false', '0', 'no', 'off'}
+
+
+def boolean(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+    raise ValueError("must be true or false")
+
+
+def iso_date(value):
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError("must be a date (YYYY-MM-DD)") from None
+
+
+def comma_list(value):
+    return [item.strip() for item in string(value).split(',') if item.strip()]
+
+
+class Invalid(ValueError):
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+class Arg:
+    def __init__(self, convert=string, required=False, default=None, many=False, choices=None):
+        self.convert = convert
+        self.required = required
+        self.default = default
+        self.many = many
+        self.choices = choices
+
+    def load(self, raw):
+        value = self.convert(raw)
+        if self.choices is not None and value not in self.choices:
+            raise ValueError(f"must be one of {', '.join(map(str, self.choices))}")
+        return value
+
+
+MISSING = "Missing required parameter"
+
+
+class RequestSchema:
+    """Named Args read from the request body ('body') or the query string ('args')."""
+
+    def __init__(self, location='body', **args):
+        self.location = location
+        self.args = args
+        self._fields = tuple(args.items())
+
+    def extend(self, **more):
+        return RequestSchema(self.location, **dict(self.args, **more))
+
+    def load(self, source):
+        """Convert the arguments in source (a dict, or a MultiDict for `many` args)."""
+        result = {}
+        for name, arg in self._fields:
+            if arg.many:
+                raw = source.getlist(name) if hasattr(source, 'getlist') else source.get(name)
+                if raw is not None and not isinstance(raw, list):
+                    raw = [raw]
+            else:
+                raw = source.get(name)
+            if raw is None or raw == []:
+                if arg.required:
+                    raise Invalid({name: MISSING})
+                result[name] = arg.default
+                continue
+            try:
+                result[name] = [arg.load(item) for item in raw] if arg.many else arg.load(raw)
+            except ValueError as e:
+                raise Invalid({name: f"{name} {e}"}) from None
+        return result
+
+
+# Resources
+
+rooms_args = RequestSchema(
+    roomNumber=Arg(integer, required=True),
+    roomType=Arg(string, required=True),
+    price=Arg(integer, required=True),
+    availability=Arg(boolean, required=True),
+)
+
+customers_args = RequestSchema(
+    name=Arg(string, required=True),
+    contact=Arg(string, required=True),
+    payment=Arg(string, required=True),
+)
+
+reservations_args = RequestSchema(
+    customer=Arg(string),
+    customer_id=Arg(integer),
+    roomNumber=Arg(integer, required=True),
+    checkIn=Arg(iso_date, required=True),
+    checkOut=Arg(iso_date, required=True),
+)
+
+rooms_fields = Serializer({
+    'roomNumber': int,
+    'roomType': str,
+    'price': int,
+    'availability': bool,
+})
+
+customers_fields = Serializer({
+    'id': int,
+    'name': str,
+    'contact': str,
+    'payment': str,
+})
+
+customer_search_fields = customers_fields.extend(match=str)
+
+reservation_fields = Serializer({
+    'id': int,
+    'roomNumber': int,
+    'roomType': str,
+    'customer_id': int,
+    'checkIn': str,
+    'checkOut': str,
+})
+
+customer_reservations_fields = customers_fields.extend(reservations=[reservation_fields])
+
+bill_fields = Serializer({
+    'customer_id': int,
+    'stays': int,
+    'nights': int,
+    'total': int,
+})
@@ -0,0 +1,196 @@
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from functools import wraps
+
+import Models as models
+
+# Write-behind batching for the Models write functions.
+#
+# With the queue running, submit(fn, ...) hands a write to a background thread
+# and returns a Future. The thread takes writes off the queue and runs up to
+# max_batch of them in one transaction, so a burst of writes shares one
+# BEGIN/COMMIT instead of queueing on SQLite's write lock one commit at a time.
+# With max_delay 0 a batch is whatever queued up while the previous one was
+# committing; a positive max_delay waits up to that many seconds after the
+# first write for more to arrive (fewer, larger commits, more latency).
+#
+# Each write runs inside its own SAVEPOINT: a write that fails is rolled back
+# on its own and its future gets the error, while the rest of the batch
+# commits. A future resolves only once its batch has committed. When
+# max_pending writes are waiting, submit() blocks (up to `timeout`, then
+# raises queue.Full). stop() drains the queue, commits and checkpoints the WAL;
+# it also runs at interpreter exit. A write runs against the property selected
+# (models.use_property) when it was submitted; a batch spanning several
+# properties commits once per property.
+
+MAX_BATCH = 200
+MAX_DELAY = 0.0
+MAX_PENDING = 10000
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    def __init__(self, max_batch=MAX_BATCH, max_delay=MAX_DELAY, max_pending=MAX_PENDING):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.batches = 0
+        self.writes = 0
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._run, name='hotel-write-behind', daemon=True)
+        self._stopped = False
+        self._properties = set()
+        self._thread.start()
+
+    def submit(self, fn, *args, timeout=None, **kwargs):
+        """Queue fn(*args, **kwargs); returns a Future for its return value."""
+        if self._stopped:
+            raise RuntimeError("write-behind queue is stopped")
+        future = Future()
+        self._queue.put((fn, args, kwargs, future, models.current_property()), timeout=timeout)
+        return future
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def stop(self):
+        """Commit everything queued so far, then stop the writer thread."""
+        if self._stopped:
+            return
+        self._stopped = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        # A submit() racing with stop() can land behind the sentinel.
+        while True:
+            try:
+                future = self._queue.get_nowait()[3]
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("write-behind queue is stopped"))
+        # Move the committed batches from the WAL into the database files.
+        models.execute_query('PRAGMA wal_checkpoint(TRUNCATE)', fetch=True)
+        for property_id in self._properties:
+            with models.use_property(property_id):
+                models.execute_query('PRAGMA wal_checkpoint(TRUNCATE)', fetch=True)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+            if stopping:
+                return
+
+    def _commit(self, batch):
+        by_property = {}
+        for op in batch:
+            if op[3].set_running_or_notify_cancel():
+                by_property.setdefault(op[4], []).append(op)
+        for property_id, writes in by_property.items():
+            if property_id is None:
+                self._commit_writes(writes)
+            else:
+                self._properties.add(property_id)
+                with models.use_property(property_id):
+                    self._commit_writes(writes)
+
+    def _commit_writes(self, batch):
+        def work():
+            outcomes = []
+            with models.transaction(immediate=True) as tx:
+                for fn, args, kwargs, _, _ in batch:
+                    failures = len(tx.errors)
+                    tx.execute('SAVEPOINT write_behind')
+                    try:
+                        outcome = (True, fn(*args, **kwargs))
+                    except Exception as e:
+                        outcome = (False, e)
+                    # Models writes report their own errors; tx.errors still records them.
+                    if outcome[0] and len(tx.errors) > failures:
+                        outcome = (False, tx.errors[-1])
+                    if not outcome[0]:
+                        tx.execute('ROLLBACK TO write_behind')
+                    tx.execute('RELEASE write_behind')
+                    outcomes.append(outcome)
+            return outcomes
+
+        try:
+            outcomes = models.run_with_retry(work)
+        except Exception as e:
+            for op in batch:
+                op[3].set_exception(e)
+            return
+        self.batches += 1
+        self.writes += len(batch)
+        for (ok, value), op in zip(outcomes, batch):
+            future = op[3]
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+
+_write_queue = None
+_lock = threading.Lock()
+
+
+def start(**options):
+    """Start the shared write-behind queue (max_batch, max_delay, max_pending)."""
+    global _write_queue
+    with _lock:
+        if _write_queue is None:
+            _write_queue = WriteBehindQueue(**options)
+            atexit.register(stop)
+        return _write_queue
+
+
+def running():
+    return _write_queue is not None
+
+
+def stop():
+    global _write_queue
+    with _lock:
+        write_queue, _write_queue = _write_queue, None
+    if write_queue is not None:
+        write_queue.stop()
+
+
+def submit(fn, *args, **kwargs):
+    write_queue = _write_queue
+    if write_queue is None:
+        raise RuntimeError("write-behind queue is not running; call writeBehind.start()")
+    return write_queue.submit(fn, *args, **kwargs)
+
+
+def _deferred(fn):
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        return submit(fn, *args, **kwargs)
+    return wrapper
+
+
+add_room_to_db = _deferred(models.add_room_to_db)
+add_customer_to_db = _deferred(models.add_customer_to_db)
+add_reservation_to_db = _deferred(models.add_reservation_to_db)
+delete_room_from_db = _deferred(models.delete_room_from_db)
+delete_customer_from_db = _deferred(models.delete_customer_from_db)
+delete_reservation_from_db = _deferred(models.delete_reservation_from_db)
+cancel_reservation = _deferred(models.cancel_reservation)
+checkout = _deferred(models.checkout)